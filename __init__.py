@@ -3,9 +3,19 @@ Module to parse requirements for used and unused packages.
 """
 import os
 import time
+from collections import Counter
 from datetime import datetime
-import pandas as pd
-from parse import Parse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from parse import TREE_SOURCES, Parse
+from parse.cache import ImportCache
+from parse.export import NOT_IN_REQUIREMENT_COLUMNS, REQUIREMENT_COLUMNS, USAGE_COLUMNS, get_exporter
+from parse.attribution import ImportAttribution
+from parse.extract import extract_file, extract_file_timed, get_engine
+from parse.index import DependencyIndex
+from parse.instrument import Instrument
+from parse.pipeline import ReadPipeline
+from parse.walk import DEFAULT_EXCLUDES, MAX_DEPTH, walk_py_files
 
 
 class CheckParentDjangoDirectory:
@@ -18,76 +28,125 @@ class CheckParentDjangoDirectory:
             a. 0 = not used
             b. 1 = used
         4. If an import is used but not in requirements.txt
-            it is added to not_in_requirements.txt
-            1 column.
-            All packages in the file are used.
+            it is added to not_in_requirements.csv
+            with the number of files importing it.
 
     Attributes
     ----------
         now : (str) timestamp
-        chks_parent_dj_dir : (str) the directory this code lives in
+        chks_parent_dj_dir : (str) the directory this code lives in, the results are written here
         parent_dj_proj : (str) the directory of the django project
-        parse : (Parse) a parsing class (parse/__init__.py)
-        req : (pd.DataFrame) [cols: []]
-        not_in_req : (pd.DataFrame) [cols: []]
+            the parent of chks_parent_dj_dir unless passed in
+        parse : (Parse) a parsing class (parse/__init__.py), a new one unless passed in
+        req : (DependencyIndex) the requirements and if they are used (parse/index.py)
+        not_in_req : (Counter) package that is not in the requirements => number of files importing it
+        attribution : (ImportAttribution) package => the files importing it and the lines (parse/attribution.py)
+        record_files : (bool) list the importing files in the reports
+        formats : (tuple[str]) the formats to export, csv, jsonl or parquet (parse/export.py)
+        stable_schema : (bool) export one usage table with the same columns every run
+        excludes : (tuple[str]) glob patterns of directories and files not to scan (parse/walk.py)
+        use_gitignore : (bool) skip what the project's .gitignore files ignore
+        max_depth : (int) directories nested deeper than this are not scanned
+        workers : (int) number of processes extracting imports
+            1 scans every file on the main thread
+        executor : (ProcessPoolExecutor) a pool shared with other projects (batch.py)
+            a pool of workers processes is started for the run unless passed in
+        readers : (int) files read at the same time by the asyncio pipeline (parse/pipeline.py)
+            for network mounted projects, 0 scans with workers instead
+        engine : (str) how imports are extracted, 'line' or 'ast' (parse/extract.py)
+        full_scan : (bool) read whole files instead of stopping after the imports at the top
+        cache : (ImportCache) imports of the files from the last run (parse/cache.py)
+            None if caching is turned off
+        instrument : (Instrument) stage timers and profiling of the run (parse/instrument.py)
+            a silent one that only times the stages unless passed in
     """
 
-    def __init__(self, chks_parent_dj_dir):
+    def __init__(self, chks_parent_dj_dir, workers=1, use_cache=True, hash_contents=False, engine='line',
+                 full_scan=False, record_files=False, excludes=DEFAULT_EXCLUDES, use_gitignore=True,
+                 max_depth=MAX_DEPTH, formats=('csv',), stable_schema=False, parse=None,
+                 instrument=None, parent_dj_proj=None, executor=None, tree_source='metadata', readers=0):
+        # fail on a typo before the slow setup
+        get_engine(engine)
+        if tree_source not in TREE_SOURCES:
+            raise ValueError('Unknown tree source ' + repr(tree_source) + ', expected one of '
+                             + ', '.join(TREE_SOURCES))
+        for export_format in formats:
+            get_exporter(export_format)
+        self.instrument = instrument if instrument is not None else Instrument(top_n=0, sinks=[])
+        self.instrument.start()
         self.now = str(time.mktime(datetime.now().timetuple()))[:-2]
         self.chks_parent_dj_dir = chks_parent_dj_dir
-        self.parent_dj_proj = os.path.dirname(chks_parent_dj_dir)
-        self.parse = Parse()
-        self.req = self.parse.treefreeze(self.parent_dj_proj)
-        self.not_in_req = pd.Series(name='pkg')
+        self.parent_dj_proj = parent_dj_proj if parent_dj_proj is not None else os.path.dirname(chks_parent_dj_dir)
+        self.parse = parse if parse is not None else Parse()
+        with self.instrument.stage('get_import_names'):
+            # Util keeps the index, the dependencies reuse it
+            site_index = self.parse.util.get_import_names()
+        with self.instrument.stage('dependencies'):
+            # built once, files then mark usage with set operations
+            if tree_source == 'treefreeze':
+                self.req = DependencyIndex.from_frame(self.parse.treefreeze(self.parent_dj_proj), site_index)
+            else:
+                self.req = DependencyIndex(self.parse.resolve(self.parent_dj_proj), site_index)
+        self.not_in_req = Counter()
+        self.attribution = ImportAttribution()
+        self.record_files = record_files
+        self.formats = tuple(formats)
+        self.stable_schema = stable_schema
+        self.excludes = tuple(excludes)
+        self.use_gitignore = use_gitignore
+        self.max_depth = max_depth
+        self.workers = workers
+        self.engine = engine
+        self.full_scan = full_scan
+        self.executor = executor
+        self.readers = readers
+        self.cache = None
+        if use_cache:
+            self.cache = ImportCache.in_directory(chks_parent_dj_dir, self.parent_dj_proj, engine=engine,
+                                                  full_scan=full_scan, hash_contents=hash_contents)
+            self.cache.load()
 
-    def parse_project_file(self, imports):
+    def parse_project_file(self, pkgs, f_name=None):
         """
         Checks each individual file for the used and unused packages
         Changes used from 0 to 1 if used.
         If it is used once then we should not remove it once iteration is over
 
-        :param imports: (pd.Series) lines with the import statements
-        """
-        # removes excess words only keep package name
-        # from numpy import add => ["from", "numpy", "import", "add"]
-        # import numpy as np => ["import", "numpy", "as", "np"]
-        # from django.db import blah => ["from", "django.db", "import", "blah"]
-        # from .lint import Lint => ["from", ".lint", "import", "Lint"]
-        pkgs = imports.str.split(" ", expand=True)[1]
-        # numpy
-        # django.db
-        # .lint
-        pkgs = pkgs.str.split('.', expand=True)[0]
-        # django.db => django
-        # .lint => ""
-        # .lint would cause an error because nothing there
-        # this gets rid of those blank imports
-        pkgs = pkgs[pkgs != ""]
-        pkgs.reset_index(drop=True)
-        req_pkgs = pkgs[pkgs.isin(self.req.index)]
-        if req_pkgs.any():
-            # where this index matches in the requirements df increment + 1
-            r = self.req.loc[req_pkgs]
-            print(r)
-            self.req.at[req_pkgs, 'used'] = 1
-        else:
-            # ~ is a bitwise not in python means not in requirements below
-            not_req_pkgs = pkgs[~pkgs.isin(self.req.index)]
-            not_req_pkgs = not_req_pkgs.rename('pkg')
-            # if there is nothing then it just appends nothing so nothing happens
-            self.not_in_req = self.not_in_req.append(not_req_pkgs, ignore_index=True)
-            # make a huge series. we'll drop duplicates at the end b4 exporting
+        :param pkgs: (dict[str, int]) package names imported by the file and their lines (parse/extract.py)
+        :param f_name: (str) the file, the imports are only attributed to it when it is passed
+        """
+        self.req.mark(pkgs)
+        if f_name is not None:
+            self.attribution.add(f_name, pkgs)
+        # each file counts once per package, whatever else it imports
+        self.not_in_req.update(pkgs.keys() - self.req.names)
+
+    def forget_project_file(self, pkgs, f_name=None):
+        """
+        Undoes parse_project_file for a file that changed or was deleted (parse/watch.py)
+
+        :param pkgs: (dict[str, int]) package names the file imported and their lines
+        :param f_name: (str) the file, if its imports were attributed to it
+        """
+        self.req.unmark(pkgs)
+        if f_name is not None:
+            self.attribution.remove(f_name, pkgs)
+        undeclared = pkgs.keys() - self.req.names
+        self.not_in_req.subtract(undeclared)
+        for pkg in undeclared:
+            if self.not_in_req[pkg] <= 0:
+                del self.not_in_req[pkg]
 
-    def loop_dir(self, directory):
+    def iter_files(self, dirs=None):
         """
-        Recursively look through directories
-        This fn pretty pointless I just thought
-        there was too much indentation
+        Walks the django project, leaving out chks_parent_dj_dir,
+        the excluded and the git ignored directories
 
-        :param directory: directory name
+        :param dirs: (list[str]) if passed every directory walked is appended to it
+        :return: (generator[str]) paths of the py files
         """
-        for file_or_dir in os.listdir(directory):
-            self.route_file_dir(directory, file_or_dir)
+        return walk_py_files(self.parent_dj_proj, excludes=self.excludes, use_gitignore=self.use_gitignore,
+                             max_depth=self.max_depth, skip_dirs=[self.chks_parent_dj_dir], dirs=dirs)
 
     def check_if_empty_file(self, f_name):
         """
@@ -99,55 +158,207 @@ class CheckParentDjangoDirectory:
 
         :param  f_name: (str) filename
         """
-        with open(f_name, 'r') as file:
-            lines = pd.Series([line for line in file])
-        # checks for any empty files to avoid crashing
-        if lines.any():
-            lines = lines.str.strip()
-            # import statement starts with import
-            i_import = lines[lines.str.startswith('import')]
-            # import statement starts with from
-            f_import = lines[lines.str.startswith('from')]
-            # all import statments
-            a_imports = i_import.append(f_import)
-            # checks for any blank imports
-            # no lines that start with import or from
-            if a_imports.any():
-                self.parse_project_file(a_imports)
-
-    def route_file_dir(self, parent_dir, file_or_dir):
-        """
-        :param file_or_dir: file or directory name
-        :param parent_dir: parent directory name
-        """
-        # full file path
-        parent_w_child = os.path.join(parent_dir, file_or_dir)
-        if len(file_or_dir.split(".")) == 1:  # if it's a directory
-            # 'proj'.split(".") => ['proj'] => len == 1
-            self.loop_dir(parent_w_child)
-        elif file_or_dir.split(".")[1] == 'py':  # it's a py file
-            # 'parse.py'.split(".") => ['Check', 'py'] => len == 2
-            self.check_if_empty_file(parent_w_child)
-        else:  # it's a reg  file
-            pass
-
-    def export(self):
-        """
-        Creates two files
+        pkgs = self.extract_imports([f_name])[0]
+        if pkgs:
+            self.parse_project_file(pkgs, f_name)
+
+    def extract_imports(self, f_names):
+        """
+        Finds the package names imported by each file.
+        Unchanged files come from the cache,
+        the rest are read on the main thread or in worker processes.
+        The workers only return the package names,
+        they are kept in the order of f_names
+        so the serial and parallel scans give the same results.
+
+        :param f_names: (list[str]) paths of the py files
+        :return: (list[dict[str, int]]) the package names of each file and their lines
+        """
+        found = {}
+        if self.cache is not None:
+            for f_name in f_names:
+                pkgs = self.cache.get(f_name)
+                if pkgs is not None:
+                    found[f_name] = pkgs
+        missing = [f_name for f_name in f_names if f_name not in found]
+        # only measure each file when the slowest files are wanted
+        timed = self.instrument.top_n > 0
+        extract = partial(extract_file_timed if timed else extract_file, engine=self.engine, full_scan=self.full_scan)
+        # big chunks keep the pickling overhead down on huge projects
+        chunksize = max(1, len(missing) // (self.workers * 4))
+        if self.executor is not None and len(missing) > 1:
+            extracted = list(self.executor.map(extract, missing, chunksize=chunksize))
+        elif self.workers > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                extracted = list(executor.map(extract, missing, chunksize=chunksize))
+        else:
+            extracted = [extract(f_name) for f_name in missing]
+        if timed:
+            for f_name, (_, seconds, size) in zip(missing, extracted):
+                self.instrument.file_read(f_name, seconds, size)
+            extracted = [pkgs for pkgs, _, _ in extracted]
+        self.instrument.files += len(f_names)
+        for f_name, pkgs in zip(missing, extracted):
+            found[f_name] = pkgs
+            if self.cache is not None:
+                self.cache.put(f_name, pkgs)
+        return [found[f_name] for f_name in f_names]
+
+    def read_pipeline(self):
+        """
+        Walks the project and extracts the imports with the asyncio pipeline (parse/pipeline.py),
+        the reads wait on the file system at the same time instead of one after the other
+
+        :return: (tuple[list[str], list[dict[str, int]]]) the paths in walk order and the imports of each
+        """
+        pipeline = ReadPipeline(engine=self.engine, full_scan=self.full_scan, readers=self.readers,
+                                cache=self.cache, instrument=self.instrument)
+        f_names, imports = pipeline.run(self.iter_files())
+        self.instrument.files += len(f_names)
+        return f_names, imports
+
+    def requirement_rows(self):
+        """
+        :return: (list[tuple[str, str, int, int]]) (req, dep, used, import_count) rows without duplicates,
+            used first
+        """
+        # dict keeps the first of each row, one stable sort keeps the tree order within used/unused
+        rows = sorted(dict.fromkeys(self.req.table()), key=lambda row: -row[2])
+        return [(req, dep, used, self.req.counts[req]) for req, dep, used in rows]
+
+    def not_in_req_rows(self):
+        """
+        :return: (list[tuple]) (pkg, file_count[, files]) rows, most imported first
+        """
+        rows = sorted(self.not_in_req.items(), key=lambda item: (-item[1], item[0]))
+        if self.record_files:
+            rows = [(pkg, count, self.relative_files(pkg)) for pkg, count in rows]
+        return rows
+
+    def relative_files(self, pkg):
+        """
+        :param pkg: (str) package name
+        :return: (list[str]) the files importing it, relative to the project
+        """
+        return [os.path.relpath(f_name, self.parent_dj_proj) for f_name, _ in self.attribution.files(pkg)]
+
+    def requirement_files(self, name):
+        """
+        :param name: (str) requirement
+        :return: (list[str]) the files importing any of its import names, relative to the project
+        """
+        files = []
+        for import_name in self.req.import_names[name]:
+            files.extend(self.relative_files(import_name))
+        # a file importing two of them is listed once
+        return list(dict.fromkeys(files))
+
+    def usage_rows(self):
+        """
+        :return: (generator[tuple]) rows of USAGE_COLUMNS (parse/export.py)
+        """
+        for name in sorted(self.req.rows):
+            files = self.requirement_files(name) if self.record_files else []
+            yield (self.now, name, 'requirement', self.req.deps_of(name), int(name in self.req.used_names),
+                   self.req.counts[name], files)
+        for pkg, count in sorted(self.not_in_req.items()):
+            files = self.relative_files(pkg) if self.record_files else []
+            yield self.now, pkg, 'not_in_requirements', [], 1, count, files
+
+    def export(self, suffix=None):
+        """
+        Creates two files per format
         requirements-now.csv:
             contains all the packages from the requirements and 0 if not used 1 if used
         not_in_requirements-now.csv:
             IMPORT statements that were not declared in requirement.txt but were used
+            with the number of files importing them (and the files if recorded)
+        or with stable_schema one file per format
+        usage-now.csv:
+            requirements and undeclared imports with their dependencies, usage and importing files
+
+        :param suffix: (str) ends the file names instead of now, the same suffix rewrites the same files
         """
-        req_csv = os.path.join(self.chks_parent_dj_dir, 'requirements-' + self.now + '.csv')
-        print('exporting to ' + req_csv)
-        self.req.sort_values(by=['used'], inplace=True, ascending=False)
-        self.req.drop_duplicates(keep='first', inplace=True)
-        self.req.to_csv(req_csv)
-        not_req_csv = os.path.join(self.chks_parent_dj_dir, 'not_in_requirements-' + self.now + '.csv')
-        self.not_in_req.drop_duplicates(keep='first', inplace=True)
-        print('exporting to ' + not_req_csv)
-        self.not_in_req.to_csv(not_req_csv, index=False, header=True)
+        suffix = suffix if suffix is not None else self.now
+        not_in_req_columns = NOT_IN_REQUIREMENT_COLUMNS
+        if self.record_files:
+            not_in_req_columns = not_in_req_columns + [('files', 'list')]
+        for export_format in self.formats:
+            exporter = get_exporter(export_format)
+            if self.stable_schema:
+                tables = [('usage-', USAGE_COLUMNS, self.usage_rows())]
+            else:
+                tables = [('requirements-', REQUIREMENT_COLUMNS, self.requirement_rows()),
+                          ('not_in_requirements-', not_in_req_columns, self.not_in_req_rows())]
+            for prefix, columns, rows in tables:
+                path = os.path.join(self.chks_parent_dj_dir, prefix + suffix + '.' + exporter.extension)
+                print('exporting to ' + path)
+                exporter.write(path, columns, rows)
+
+    def explain(self, name):
+        """
+        Why a package is or is not used, after scan()
+
+        :param name: (str) import name or project name, yaml or PyYAML
+        :return: (list[dict]) one per import name of the package
+            name, requirement (bool), status, files [(path, line)],
+            requirements [(requirement, used)] installing the import name,
+            required_by [(requirement, used)] of the distributions installing it,
+            provided_by [distribution], several for namespace packages (google)
+        """
+        site_index = self.parse.util.get_import_names()
+        if name in self.req.names or name in self.attribution.hits:
+            import_names = [name]
+        else:
+            import_names = site_index.get(name) or [name]
+        explained = []
+        for import_name in import_names:
+            files = [(os.path.relpath(f_name, self.parent_dj_proj), line)
+                     for f_name, line in self.attribution.files(import_name)]
+            requirements = [(req, int(req in self.req.used_names)) for req in self.req.imports.get(import_name, [])]
+            provided_by = site_index.providers(import_name)
+            required_by = []
+            for dist in provided_by:
+                required_by.extend(req for req in self.req.dependents_of(dist) if req not in required_by)
+            required_by = [(req, int(req in self.req.used_names)) for req in required_by]
+            if files:
+                status = 'imported' if requirements else 'imported, not in the requirements'
+            elif any(used for _, used in requirements):
+                # _pytest of pytest, the project imports pytest
+                status = 'not imported, its requirement is used through another import name'
+            elif any(used for _, used in required_by):
+                status = 'not imported, needed by used requirements'
+            elif requirements:
+                status = 'unused'
+            else:
+                status = 'not imported'
+            explained.append({'name': import_name, 'requirement': bool(requirements), 'status': status,
+                              'files': files, 'requirements': requirements, 'required_by': required_by,
+                              'provided_by': provided_by})
+        return explained
+
+    def scan(self):
+        """
+        Walks the project, extracts the imports of every file and marks the requirements used
+        """
+        if self.readers > 0:
+            # the walk overlaps the reads, both are timed as extract
+            with self.instrument.stage('extract'):
+                f_names, imports = self.read_pipeline()
+        else:
+            with self.instrument.stage('walk'):
+                f_names = list(self.iter_files())
+            with self.instrument.stage('extract'):
+                imports = self.extract_imports(f_names)
+        with self.instrument.stage('merge'):
+            for f_name, pkgs in zip(f_names, imports):
+                if pkgs:
+                    self.parse_project_file(pkgs, f_name)
+        if self.cache is not None:
+            with self.instrument.stage('cache'):
+                self.cache.prune(f_names)
+                self.cache.save()
+            self.cache.report()
 
     def run(self):
         """
@@ -155,9 +366,9 @@ class CheckParentDjangoDirectory:
         Loops through all the directories
         """
         print('checking for unused requirements')
-        parent_dj_proj_files = [x for x in os.listdir(self.parent_dj_proj) if x not in ['chks_parent_dj_dir']]
-        for file_or_dir in parent_dj_proj_files:
-            self.route_file_dir(self.parent_dj_proj, file_or_dir)
-
-        self.export()
+        self.scan()
+        with self.instrument.stage('export'):
+            self.export()
+        self.instrument.stop()
+        self.instrument.emit()
         print('parse done')
@@ -0,0 +1,160 @@
+"""
+Checks many django projects that share one python environment in a single run
+
+    python cli.py batch ~/services/orders ~/services/payments --output ~/audit
+
+The site-packages index is built once and shared by every project,
+the projects are scanned at the same time on threads that share one pool of extraction processes.
+Writes the reports of each project to output/<project name>/
+and combined reports with a project column to output/.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from __init__ import CheckParentDjangoDirectory
+from parse import Parse
+from parse.export import NOT_IN_REQUIREMENT_COLUMNS, REQUIREMENT_COLUMNS, USAGE_COLUMNS, get_exporter
+from parse.util import Util
+
+
+def output_names(projects):
+    """
+    :param projects: (list[str]) project directories
+    :return: (list[str]) a unique directory name for the reports of each project
+        orders, payments, orders-2 for two projects named orders
+    """
+    names = []
+    for project in projects:
+        name = os.path.basename(os.path.normpath(project))
+        unique = name
+        i = 2
+        while unique in names:
+            unique = name + '-' + str(i)
+            i += 1
+        names.append(unique)
+    return names
+
+
+class Batch:
+    """
+    Scans many projects with one Parse, one site-packages index and one process pool
+
+    Attributes
+    ----------
+    projects : list[str]
+        the django project directories
+    names : list[str]
+        the name of each project in the reports (output_names)
+    output : str
+        the combined reports are written here, each project's reports in a directory named after it
+    workers : int
+        extraction processes shared by all the projects, 1 reads on the scanning threads
+    threads : int
+        projects scanned at the same time
+    formats : tuple[str]
+        the formats to export, csv, jsonl or parquet (parse/export.py)
+    stable_schema : bool
+        export one usage table with the same columns every run
+    options : dict
+        the other keyword arguments of CheckParentDjangoDirectory (engine, use_cache, excludes ...)
+    parse : Parse
+        shared by every project, its Util indexes site-packages once
+    checks : dict[str, CheckParentDjangoDirectory]
+        project name => its finished scan
+    failed : dict[str, str]
+        project name => why it could not be scanned
+    now : str
+        timestamp of the combined reports
+    """
+    def __init__(self, projects, output, workers=1, threads=4, formats=('csv',), stable_schema=False, parse=None,
+                 **options):
+        self.projects = [os.path.abspath(project) for project in projects]
+        self.names = output_names(self.projects)
+        self.output = os.path.abspath(output)
+        self.workers = workers
+        self.threads = threads
+        self.formats = tuple(formats)
+        self.stable_schema = stable_schema
+        self.options = options
+        self.parse = parse if parse is not None else Parse(util=Util())
+        self.checks = {}
+        self.failed = {}
+        self.now = str(time.mktime(datetime.now().timetuple()))[:-2]
+
+    def scan_project(self, name, project, executor):
+        """
+        :param name: (str) project name
+        :param project: (str) the django project directory
+        :param executor: (ProcessPoolExecutor) the shared extraction pool, None to read on this thread
+        :return: (CheckParentDjangoDirectory) the finished scan
+        """
+        chks_parent_dj_dir = os.path.join(self.output, name)
+        os.makedirs(chks_parent_dj_dir, exist_ok=True)
+        check = CheckParentDjangoDirectory(chks_parent_dj_dir, parent_dj_proj=project, workers=self.workers,
+                                           formats=self.formats, stable_schema=self.stable_schema,
+                                           parse=self.parse, executor=executor, **self.options)
+        check.run()
+        return check
+
+    def run(self):
+        """
+        Scans every project and writes the combined reports
+        """
+        start = time.perf_counter()
+        # built before the threads start so they all share it
+        self.parse.util.get_import_names()
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            with ThreadPoolExecutor(max_workers=self.threads) as threads:
+                futures = [(name, threads.submit(self.scan_project, name, project, executor))
+                           for name, project in zip(self.names, self.projects)]
+                for name, future in futures:
+                    try:
+                        self.checks[name] = future.result()
+                    # Parse.read_file exits when requirements.txt or treefreeze.txt is missing
+                    except SystemExit:
+                        self.failed[name] = 'requirements.txt or treefreeze.txt is missing'
+                    except Exception as error:
+                        self.failed[name] = repr(error)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        for name, reason in self.failed.items():
+            print('Could not scan ' + name + ': ' + reason)
+        self.export()
+        print('scanned ' + str(len(self.checks)) + ' projects in {:.2f}s'.format(time.perf_counter() - start)
+              + (', ' + str(len(self.failed)) + ' failed' if self.failed else ''))
+
+    def combined_rows(self, rows):
+        """
+        :param rows: (callable) CheckParentDjangoDirectory => its rows
+        :return: (generator[tuple]) the rows of every project with the project name first
+        """
+        for name in self.names:
+            if name in self.checks:
+                for row in rows(self.checks[name]):
+                    yield (name,) + tuple(row)
+
+    def export(self):
+        """
+        Writes the combined reports, combined-requirements-now.csv and combined-not_in_requirements-now.csv
+        or combined-usage-now.csv with stable_schema
+        """
+        project = [('project', 'str')]
+        for export_format in self.formats:
+            exporter = get_exporter(export_format)
+            if self.stable_schema:
+                tables = [('combined-usage-', project + USAGE_COLUMNS,
+                           self.combined_rows(lambda check: check.usage_rows()))]
+            else:
+                # the files are left out, not every project has to record them
+                tables = [('combined-requirements-', project + REQUIREMENT_COLUMNS,
+                           self.combined_rows(lambda check: check.requirement_rows())),
+                          ('combined-not_in_requirements-', project + NOT_IN_REQUIREMENT_COLUMNS,
+                           self.combined_rows(lambda check: [row[:2] for row in check.not_in_req_rows()]))]
+            for prefix, columns, rows in tables:
+                path = os.path.join(self.output, prefix + self.now + '.' + exporter.extension)
+                print('exporting to ' + path)
+                exporter.write(path, columns, rows)
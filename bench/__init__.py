@@ -0,0 +1,5 @@
+"""
+Benchmarks for the project scan
+
+Run them from the chks_parent_dj_dir directory, e.g. 'python -m bench.extract'
+"""
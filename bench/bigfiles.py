@@ -0,0 +1,131 @@
+"""
+Benchmark of the import extraction on very large generated modules
+
+Writes big migrations (long operation lists after the imports)
+and fixture modules (data only, no imports) and extracts every file
+with each engine in a fresh process, reporting seconds, the peak traced python memory
+and the growth of the peak RSS of that process.
+    python -m bench.bigfiles --files 4 --megabytes 8
+
+The ast engine holds the whole tree of a file, expect it to take minutes and gigabytes on big sizes.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from parse.extract import ENGINES, extract_file, extract_file_pandas
+
+
+def write_migration(f_name, size, rand):
+    """
+    A django migration with the imports at the top and size bytes of operations
+
+    :param f_name: (str) filename
+    :param size: (int) roughly how many bytes to write
+    :param rand: (random.Random) random generator
+    """
+    with open(f_name, 'w') as file:
+        file.write('# Generated by Django 3.2 on 2022-01-01 00:00\n\n'
+                   'from django.conf import settings\n'
+                   'from django.db import migrations, models\n'
+                   'import django.db.models.deletion\n\n\n'
+                   'class Migration(migrations.Migration):\n\n'
+                   '    operations = [\n')
+        written = 0
+        i = 0
+        while written < size:
+            line = ("        migrations.AddField(model_name='model_{}', name='field_{}', "
+                    "field=models.IntegerField(default={})),\n").format(i % 97, i, rand.randrange(1000))
+            file.write(line)
+            written += len(line)
+            i += 1
+        file.write('    ]\n')
+
+
+def write_fixture(f_name, size, rand):
+    """
+    A module of data only, no imports at all
+
+    :param f_name: (str) filename
+    :param size: (int) roughly how many bytes to write
+    :param rand: (random.Random) random generator
+    """
+    with open(f_name, 'w') as file:
+        file.write('FIXTURES = [\n')
+        written = 0
+        while written < size:
+            line = "    {{'pk': {}, 'name': 'row {}', 'value': {}}},\n".format(written, written, rand.random())
+            file.write(line)
+            written += len(line)
+        file.write(']\n')
+
+
+def measure(extract, f_names):
+    """
+    Runs in a fresh worker process
+
+    :param extract: (callable) f_name => set of package names
+    :param f_names: (list[str]) files to extract
+    :return: (tuple[float, int, int, list[list[str]]]) seconds, peak traced bytes,
+        peak RSS growth in KB and the sorted results
+    """
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = [sorted(extract(f_name)) for f_name in f_names]
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base_rss, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=4, help='big files, half migrations and half fixtures')
+    parser.add_argument('--megabytes', type=int, default=8, help='size of each file')
+    parser.add_argument('--pandas', action='store_true', help='also time the original pandas implementation')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rand = random.Random(args.seed)
+    directory = tempfile.mkdtemp(prefix='bench-bigfiles-')
+    try:
+        f_names = []
+        for i in range(args.files):
+            f_name = os.path.join(directory, 'module_' + str(i) + '.py')
+            write = write_migration if i % 2 == 0 else write_fixture
+            write(f_name, args.megabytes << 20, rand)
+            f_names.append(f_name)
+        print(str(args.files) + ' files of ' + str(args.megabytes) + 'MB')
+
+        extractors = [(name + ' full scan', partial(extract_file, engine=name, full_scan=True)) for name in ENGINES]
+        extractors.insert(0, ('line', partial(extract_file, engine='line')))
+        if args.pandas:
+            extractors.insert(0, ('pandas', extract_file_pandas))
+        found = {}
+        # spawn so no memory of this process is inherited
+        context = multiprocessing.get_context('spawn')
+        print('{:<18} {:>9} {:>14} {:>14}'.format('engine', 'seconds', 'traced peak', 'rss growth'))
+        for name, extract in extractors:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                seconds, peak, rss, results = executor.submit(measure, extract, f_names).result()
+            print('{:<18} {:9.3f} {:>12}KB {:>12}KB'.format(name, seconds, peak // 1024, rss))
+            found[name] = results
+        # the ast engine is always right
+        for name, results in found.items():
+            if name != 'pandas' and results != found['ast full scan']:
+                print('!! ' + name + ' found other imports than the ast engine')
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
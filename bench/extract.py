@@ -0,0 +1,113 @@
+"""
+Microbenchmark of the import extraction of a single file
+
+Compares the original pandas implementation with the extraction engines
+and reports files/sec for each. The ast engine is also timed in a worker pool.
+    python -m bench.extract --files 2000 --workers 4
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from parse.extract import ENGINES, extract_file, extract_file_pandas
+
+PACKAGES = ['os', 'sys', 'json', 'django', 'numpy', 'pandas', 'requests', 'celery',
+            'redis', 'boto3', 'PIL', 'dateutil', 'pytz', 'six', 'yaml', 'jinja2']
+
+
+def write_file(f_name, n_imports, n_body_lines, rand):
+    """
+    Writes a module with a docstring, n_imports imports and a body
+
+    :param f_name: (str) filename
+    :param n_imports: (int) number of import lines
+    :param n_body_lines: (int) number of code lines after the imports
+    :param rand: (random.Random) random generator
+    """
+    lines = ['"""', 'A generated module', '"""', '']
+    for i in range(n_imports):
+        pkg = rand.choice(PACKAGES)
+        if i % 5 == 4:
+            lines.append('import ' + pkg + ', ' + rand.choice(PACKAGES))
+        elif i % 2:
+            lines.append('from ' + pkg + '.sub import name_' + str(i))
+        else:
+            lines.append('import ' + pkg)
+    lines.append('')
+    for i in range(n_body_lines):
+        lines.append('value_' + str(i) + ' = ' + str(i) + '  # some code')
+    with open(f_name, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+
+
+def time_extractor(extract, f_names):
+    """
+    :param extract: (callable) f_name => set of package names
+    :param f_names: (list[str]) files to extract
+    :return: (tuple[float, list]) seconds taken and the results
+    """
+    start = time.perf_counter()
+    results = [extract(f_name) for f_name in f_names]
+    return time.perf_counter() - start, results
+
+
+def time_pool(extract, f_names, workers):
+    """
+    :param extract: (callable) f_name => set of package names, must be picklable
+    :param f_names: (list[str]) files to extract
+    :param workers: (int) number of processes
+    :return: (tuple[float, list]) seconds taken and the results
+    """
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(f_names) // (workers * 4))
+        results = list(executor.map(extract, f_names, chunksize=chunksize))
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=1000, help='number of generated files')
+    parser.add_argument('--body-lines', type=int, default=200, help='code lines after the imports')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='processes for the pool timings')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rand = random.Random(args.seed)
+    directory = tempfile.mkdtemp(prefix='bench-extract-')
+    try:
+        f_names = []
+        for i in range(args.files):
+            f_name = os.path.join(directory, 'module_' + str(i) + '.py')
+            write_file(f_name, rand.randint(5, 20), args.body_lines, rand)
+            f_names.append(f_name)
+
+        extractors = [('pandas', extract_file_pandas)]
+        for engine in ENGINES:
+            extractors.append((engine, partial(extract_file, engine=engine)))
+        # the ast engine always reads the whole file
+        extractors.append(('line full_scan', partial(extract_file, engine='line', full_scan=True)))
+        results = {}
+        for name, extract in extractors:
+            seconds, results[name] = time_extractor(extract, f_names)
+            print('{:<24} {:8.3f}s {:10.0f} files/sec'.format(name, seconds, len(f_names) / seconds))
+        name = 'ast pool of ' + str(args.workers)
+        seconds, results[name] = time_pool(partial(extract_file, engine='ast'), f_names, args.workers)
+        print('{:<24} {:8.3f}s {:10.0f} files/sec'.format(name, seconds, len(f_names) / seconds))
+        # the ast engine is the reference for correct results
+        for name in results:
+            # only the names, the pandas implementation has no lines
+            wrong = sum(1 for result, right in zip(results[name], results['ast']) if set(result) != set(right))
+            if wrong:
+                print(name + ' differs from ast on ' + str(wrong) + ' files')
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
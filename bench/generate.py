@@ -0,0 +1,161 @@
+"""
+Generates a synthetic django project to benchmark against
+
+    python -m bench.generate /tmp/bench-project --files 5000 --requirements 300
+
+Creates
+    <root>/project/                      the django project
+        requirements.txt
+        treefreeze.txt                   like 'pipdeptree -f > treefreeze.txt'
+        app_0/sub_0/.../module_0.py      nested apps
+        chks_parent_dj_dir/              where the results are written
+    <root>/site-packages/                fake installed distributions
+        Bench_Req_0-1.0.0.dist-info/     METADATA, RECORD and top_level.txt
+"""
+
+import argparse
+import os
+import random
+
+STDLIB = ['os', 'sys', 'json', 're', 'datetime', 'collections', 'itertools', 'functools', 'logging', 'typing']
+# every n-th distribution ships no top_level.txt, only a RECORD
+NO_TOP_LEVEL_EVERY = 7
+
+
+def dist_name(kind, i):
+    """
+    Mixed case and underscores so the PEP 503 normalisation is exercised
+
+    :param kind: (str) Req or Dep
+    :param i: (int) number of the distribution
+    :return: (str) Bench_Req_3
+    """
+    return 'Bench_' + kind + '_' + str(i)
+
+
+def import_name(kind, i):
+    """
+    :param kind: (str) Req or Dep
+    :param i: (int) number of the distribution
+    :return: (str) bench_req_3
+    """
+    return 'bench_' + kind.lower() + '_' + str(i)
+
+
+def write(path, text):
+    """
+    :param path: (str) file to write, its directory is created
+    :param text: (str) contents
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(text)
+
+
+def write_dist(site_dir, kind, i, requires):
+    """
+    Writes a .dist-info directory and the package it installs
+
+    :param site_dir: (str) the fake site-packages
+    :param kind: (str) Req or Dep
+    :param i: (int) number of the distribution
+    :param requires: (list[str]) distribution names it depends on
+    """
+    name = dist_name(kind, i)
+    module = import_name(kind, i)
+    info = os.path.join(site_dir, name + '-1.0.' + str(i) + '.dist-info')
+    metadata = ['Metadata-Version: 2.1', 'Name: ' + name, 'Version: 1.0.' + str(i)]
+    metadata += ['Requires-Dist: ' + require for require in requires]
+    write(os.path.join(info, 'METADATA'), '\n'.join(metadata) + '\n')
+    record = [module + '/__init__.py,,', os.path.basename(info) + '/METADATA,,']
+    write(os.path.join(info, 'RECORD'), '\n'.join(record) + '\n')
+    if i % NO_TOP_LEVEL_EVERY:
+        write(os.path.join(info, 'top_level.txt'), module + '\n')
+    write(os.path.join(site_dir, module, '__init__.py'), '')
+
+
+def write_module(path, imports, body_lines):
+    """
+    :param path: (str) file to write
+    :param imports: (list[str]) import lines
+    :param body_lines: (int) number of code lines after the imports
+    """
+    lines = ['"""', 'A generated module', '"""'] + imports + ['']
+    lines += ['value_' + str(i) + ' = ' + str(i) for i in range(body_lines)]
+    write(path, '\n'.join(lines) + '\n')
+
+
+def generate(root, files=1000, imports_per_file=10, depth=3, requirements=100, deps_per_requirement=3,
+             dependencies=50, body_lines=50, seed=0):
+    """
+    :param root: (str) directory to generate in
+    :param files: (int) number of py files in the project
+    :param imports_per_file: (int) average imports per file
+    :param depth: (int) how deep the apps are nested
+    :param requirements: (int) lines in requirements.txt
+    :param deps_per_requirement: (int) average dependencies under each requirement in treefreeze.txt
+    :param dependencies: (int) distributions installed only as dependencies
+    :param body_lines: (int) code lines after the imports of each file
+    :param seed: (int) random seed, the same seed generates the same project
+    :return: (dict[str, str]) paths of the project, chks_parent_dj_dir and site_packages
+    """
+    rand = random.Random(seed)
+    project = os.path.join(root, 'project')
+    site_dir = os.path.join(root, 'site-packages')
+    chks_dir = os.path.join(project, 'chks_parent_dj_dir')
+    os.makedirs(chks_dir, exist_ok=True)
+
+    tree = {}
+    for i in range(requirements):
+        tree[i] = rand.sample(range(dependencies), min(dependencies, rand.randint(0, 2 * deps_per_requirement)))
+    for i in range(dependencies):
+        write_dist(site_dir, 'Dep', i, [])
+    for i, deps in tree.items():
+        write_dist(site_dir, 'Req', i, [dist_name('Dep', dep) + ' (>=1.0)' for dep in deps])
+
+    # requirements.txt writes names like pip freeze, treefreeze.txt like pipdeptree -f
+    write(os.path.join(project, 'requirements.txt'),
+          ''.join(dist_name('Req', i).replace('_', '-') + '==1.0.' + str(i) + '\n' for i in tree))
+    tree_lines = []
+    for i, deps in tree.items():
+        tree_lines.append(dist_name('Req', i) + '==1.0.' + str(i))
+        tree_lines += ['  ' + dist_name('Dep', dep) + '==1.0.' + str(dep) for dep in deps]
+    write(os.path.join(project, 'treefreeze.txt'), '\n'.join(tree_lines) + '\n')
+
+    req_imports = [import_name('Req', i) for i in tree] + [import_name('Dep', i) for i in range(dependencies)]
+    for i in range(files):
+        parts = ['app_' + str(i % 10)] + ['sub_' + str(level) for level in range(rand.randint(0, depth))]
+        imports = []
+        for _ in range(max(1, int(rand.gauss(imports_per_file, imports_per_file / 3)))):
+            roll = rand.random()
+            if roll < 0.4:
+                imports.append('import ' + rand.choice(STDLIB))
+            elif roll < 0.8:
+                imports.append('from ' + rand.choice(req_imports) + ' import thing')
+            else:
+                imports.append('from .module_' + str(rand.randrange(files)) + ' import thing')
+        write_module(os.path.join(project, *parts, 'module_' + str(i) + '.py'), imports, body_lines)
+    return {'project': project, 'chks_parent_dj_dir': chks_dir, 'site_packages': site_dir}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('root', help='directory to generate in')
+    parser.add_argument('--files', type=int, default=1000)
+    parser.add_argument('--imports-per-file', type=int, default=10)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--requirements', type=int, default=100)
+    parser.add_argument('--deps-per-requirement', type=int, default=3)
+    parser.add_argument('--dependencies', type=int, default=50)
+    parser.add_argument('--body-lines', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    paths = generate(args.root, files=args.files, imports_per_file=args.imports_per_file, depth=args.depth,
+                     requirements=args.requirements, deps_per_requirement=args.deps_per_requirement,
+                     dependencies=args.dependencies, body_lines=args.body_lines, seed=args.seed)
+    for name, path in paths.items():
+        print(name + ': ' + path)
+
+
+if __name__ == '__main__':
+    main()
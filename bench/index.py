@@ -0,0 +1,111 @@
+"""
+Benchmark of marking requirements used, once per scanned file
+
+Compares the DataFrame lookups on the non unique req index
+with the DependencyIndex built once after Parse.treefreeze.
+    python -m bench.index --files 10000 --requirements 300
+"""
+
+import argparse
+import random
+import time
+import pandas as pd
+from parse.index import DependencyIndex
+
+
+def make_tree(n_requirements, rand):
+    """
+    :param n_requirements: (int) number of requirements
+    :param rand: (random.Random) random generator
+    :return: (list[tuple[str, str]]) (requirement, dependency) pairs like Util.iter_packages
+    """
+    reqs = ['req_' + str(i) for i in range(n_requirements)]
+    pairs = []
+    for req in reqs:
+        pairs.append((req, req))
+        for dep in rand.sample(reqs, rand.randint(0, 8)):
+            pairs.append((req, dep))
+    return pairs
+
+
+def make_files(n_files, reqs, rand):
+    """
+    :param n_files: (int) number of files
+    :param reqs: (list[str]) requirement import names
+    :param rand: (random.Random) random generator
+    :return: (list[set[str]]) the package names imported by each file
+    """
+    others = ['os', 'sys', 'json', 're', 'datetime', 'myapp', 'settings', 'utils']
+    files = []
+    for _ in range(n_files):
+        pkgs = set(rand.sample(others, rand.randint(1, 5)))
+        pkgs.update(rand.sample(reqs, rand.randint(0, 6)))
+        files.append(pkgs)
+    return files
+
+
+def mark_frame(req_dep, files):
+    """
+    The per file DataFrame lookups the scan used to do
+
+    :param req_dep: (pd.DataFrame) indexed by req with dep and used columns
+    :param files: (list[set[str]]) the package names imported by each file
+    :return: (set[str]) the used requirements
+    """
+    for pkgs in files:
+        pkgs = pd.Series(sorted(pkgs), dtype=object)
+        req_pkgs = pkgs[pkgs.isin(req_dep.index)]
+        if req_pkgs.any():
+            req_dep.loc[req_dep.index.isin(req_pkgs), 'used'] = 1
+    return set(req_dep.index[req_dep['used'] == 1])
+
+
+def mark_index(index, files):
+    """
+    :param index: (DependencyIndex)
+    :param files: (list[set[str]]) the package names imported by each file
+    :return: (set[str]) the used requirements
+    """
+    for pkgs in files:
+        index.mark(pkgs)
+    return set(req for req, used in zip(index.reqs, index.used) if used)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=10000)
+    parser.add_argument('--requirements', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rand = random.Random(args.seed)
+    pairs = make_tree(args.requirements, rand)
+    files = make_files(args.files, sorted(set(req for req, _ in pairs)), rand)
+    print(str(len(pairs)) + ' requirement/dependency rows, ' + str(len(files)) + ' files')
+
+    req_dep = pd.DataFrame(pairs, columns=['req', 'dep']).set_index('req')
+    req_dep['used'] = 0
+    start = time.perf_counter()
+    frame_used = mark_frame(req_dep, files)
+    frame_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = DependencyIndex(pairs)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    index_used = mark_index(index, files)
+    index_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    index.table()
+    table_seconds = time.perf_counter() - start
+
+    print('{:<24} {:8.4f}s'.format('DataFrame per file', frame_seconds))
+    print('{:<24} {:8.4f}s'.format('DependencyIndex build', build_seconds))
+    print('{:<24} {:8.4f}s'.format('DependencyIndex mark', index_seconds))
+    print('{:<24} {:8.4f}s'.format('DependencyIndex export', table_seconds))
+    if frame_used != index_used:
+        print('!! the two approaches marked different requirements')
+
+
+if __name__ == '__main__':
+    main()
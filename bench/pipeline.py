@@ -0,0 +1,96 @@
+"""
+Benchmark of the asyncio pipeline against the serial walk on a slow file system
+
+A network mount is simulated by sleeping before every read,
+the serial scan waits for each file in turn, the pipeline waits for many at once.
+    python -m bench.pipeline --files 2000 --latency-ms 5 --readers 4 16 64
+
+Only the reads are slowed down, not the directory walk.
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from bench.generate import generate
+from parse.extract import extract_source
+from parse.pipeline import ReadPipeline, read_source
+from parse.walk import walk_py_files
+
+
+def latency_read(f_name, latency):
+    """
+    :param f_name: (str) filename
+    :param latency: (float) seconds to wait before reading, the round trip of a network file system
+    :return: (bytes) what read_source returns
+    """
+    time.sleep(latency)
+    return read_source(f_name)
+
+
+def serial_scan(project, read, engine):
+    """
+    The walk and extract of CheckParentDjangoDirectory.scan() without a pool, one file after the other
+
+    :param project: (str) the django project directory
+    :param read: (callable) f_name => contents
+    :param engine: (str) import engine (parse/extract.py)
+    :return: (list[dict[str, int]]) the imports of each file in walk order
+    """
+    return [extract_source(read(f_name), engine=engine, f_name=f_name) for f_name in walk_py_files(project)]
+
+
+def measure(name, scan, trace_memory):
+    """
+    :param name: (str) what is measured
+    :param scan: (callable) runs the scan, returns the imports of each file
+    :param trace_memory: (bool) also report the peak traced python memory
+    :return: (list[dict[str, int]]) what scan returned
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    found = scan()
+    seconds = time.perf_counter() - start
+    peak = ''
+    if trace_memory:
+        peak = '{:>12}KB'.format(tracemalloc.get_traced_memory()[1] // 1024)
+        tracemalloc.stop()
+    print('{:<20} {:9.3f} {:>12.0f} {}'.format(name, seconds, len(found) / seconds, peak))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='wait before every read')
+    parser.add_argument('--readers', type=int, nargs='+', default=[4, 16, 64])
+    parser.add_argument('--queue-size', type=int, default=64)
+    parser.add_argument('--engine', default='line')
+    parser.add_argument('--trace-memory', action='store_true', help='report the peak python memory of each scan')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench-pipeline-')
+    try:
+        project = generate(root, files=args.files, seed=args.seed)['project']
+        read = partial(latency_read, latency=args.latency_ms / 1000)
+        print(str(args.files) + ' files, ' + str(args.latency_ms) + 'ms per read')
+        print('{:<20} {:>9} {:>12} {}'.format('scan', 'seconds', 'files/sec',
+                                              'traced peak' if args.trace_memory else ''))
+        measure('serial, no latency', partial(serial_scan, project, read_source, args.engine), args.trace_memory)
+        expected = measure('serial', partial(serial_scan, project, read, args.engine), args.trace_memory)
+        for readers in args.readers:
+            pipeline = ReadPipeline(engine=args.engine, readers=readers, queue_size=args.queue_size, read=read)
+            found = measure('pipeline, ' + str(readers) + ' readers',
+                            lambda: pipeline.run(walk_py_files(project))[1], args.trace_memory)
+            if found != expected:
+                print('!! the pipeline with ' + str(readers) + ' readers found other imports than the serial scan')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Times every stage of CheckParentDjangoDirectory.run() on a synthetic project
+
+    python -m bench.suite --files 5000 --requirements 300 --output bench.json
+
+Stages: Util.get_import_names, Parse.treefreeze, Parse.resolve, walk, extract, merge and export.
+Each stage reports seconds, items/sec and its peak traced memory as json.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from __init__ import CheckParentDjangoDirectory
+from parse import Parse
+from parse.util import Util
+from bench.generate import generate
+
+
+class Stages:
+    """
+    Collects the timings of each stage
+
+    Attributes
+    ----------
+    trace_memory : bool
+        trace the peak python memory of each stage, makes the stages slower
+    results : dict[str, dict]
+        stage => seconds, items, items_per_sec, peak_bytes
+    """
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.results = {}
+
+    def time(self, name, fn, count=None):
+        """
+        :param name: (str) stage name
+        :param fn: (callable) runs the stage
+        :param count: (callable) result => number of items handled, for the throughput
+        :return: the result of fn
+        """
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        stage = {'seconds': round(seconds, 6)}
+        if self.trace_memory:
+            stage['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if count is not None:
+            items = count(result)
+            stage['items'] = items
+            stage['items_per_sec'] = round(items / seconds, 1) if seconds else None
+        self.results[name] = stage
+        return result
+
+
+def run_suite(paths, engine, workers, trace_memory):
+    """
+    :param paths: (dict[str, str]) from bench.generate.generate
+    :param engine: (str) import engine
+    :param workers: (int) extraction processes
+    :param trace_memory: (bool) trace the peak memory of each stage
+    :return: (dict[str, dict]) the stage results
+    """
+    stages = Stages(trace_memory)
+    site_dirs = [paths['site_packages']]
+    util = Util(site_dirs=site_dirs, use_cache=False)
+    stages.time('get_import_names', util.get_import_names, count=lambda index: len(index.names))
+    # a fresh Util so treefreeze is timed with its own site-packages crawl
+    parse = Parse(util=Util(site_dirs=site_dirs, use_cache=False))
+    stages.time('treefreeze', lambda: parse.treefreeze(paths['project']), count=len)
+    # the same tree from the Requires-Dist metadata, with its own crawl too
+    resolve_parse = Parse(util=Util(site_dirs=site_dirs, use_cache=False))
+    stages.time('resolve', lambda: resolve_parse.resolve(paths['project']), count=len)
+
+    check = CheckParentDjangoDirectory(paths['chks_parent_dj_dir'], workers=workers, use_cache=False,
+                                       engine=engine, parse=parse)
+    f_names = stages.time('walk', lambda: list(check.iter_files()), count=len)
+    imports = stages.time('extract', lambda: check.extract_imports(f_names), count=len)
+
+    def merge():
+        for f_name, pkgs in zip(f_names, imports):
+            if pkgs:
+                check.parse_project_file(pkgs, f_name)
+        return imports
+    stages.time('merge', merge, count=len)
+    stages.time('export', check.export)
+    bytes_read = sum(os.path.getsize(f_name) for f_name in f_names)
+    stages.results['extract']['bytes_per_sec'] = round(bytes_read / stages.results['extract']['seconds'], 1)
+    return stages.results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--imports-per-file', type=int, default=10)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--requirements', type=int, default=100)
+    parser.add_argument('--deps-per-requirement', type=int, default=3)
+    parser.add_argument('--dependencies', type=int, default=50)
+    parser.add_argument('--body-lines', type=int, default=50)
+    parser.add_argument('--engine', default='line')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--trace-memory', action='store_true', help='report the peak memory of each stage')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep', help='generate into this directory and keep it')
+    parser.add_argument('--output', help='json file to write, stdout by default')
+    args = parser.parse_args()
+
+    root = args.keep or tempfile.mkdtemp(prefix='bench-suite-')
+    try:
+        params = {key: value for key, value in vars(args).items() if key not in ('keep', 'output')}
+        paths = generate(root, files=args.files, imports_per_file=args.imports_per_file, depth=args.depth,
+                         requirements=args.requirements, deps_per_requirement=args.deps_per_requirement,
+                         dependencies=args.dependencies, body_lines=args.body_lines, seed=args.seed)
+        # the stages print their progress, keep stdout for the json
+        stdout = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            stages = run_suite(paths, args.engine, args.workers, args.trace_memory)
+        finally:
+            sys.stdout = stdout
+        report = {
+            'params': params,
+            'python': sys.version.split()[0],
+            'stages': stages,
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+    finally:
+        if not args.keep:
+            shutil.rmtree(root)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
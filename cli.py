@@ -0,0 +1,305 @@
+"""
+Command line for checking a django project for unused requirements
+
+    python cli.py scan --project ~/django --output ~/django/chks_parent_dj_dir
+    python cli.py query requests --project ~/django
+    python cli.py watch --project ~/django --output ~/django/chks_parent_dj_dir
+    python cli.py batch ~/services/orders ~/services/payments --output ~/audit
+    python cli.py explain six --project ~/django
+    git diff --name-only origin/main... | python cli.py diff --baseline baseline.json --project ~/django
+
+scan reads requirements.txt from the project and writes the reports to the output directory,
+the dependencies come from the installed distributions or, with --tree-source treefreeze, from treefreeze.txt.
+query answers if one requirement is imported by the project, exits 0 if it is and 1 if not.
+It uses the caches and the streaming scanner and never loads pandas.
+watch keeps the results in memory next to a dev server and rewrites the reports when they change.
+batch scans many projects of one python environment in a single run (batch.py).
+explain scans the project and tells why a package is used: the importing files and lines
+and the requirements that depend on it.
+diff reads only the files a pull request changed and reports the undeclared imports it adds
+and the requirements it leaves unused, against the baseline a scan --baseline saved (parse/diff.py).
+
+Only argparse and the tables of engines, formats and tree sources are imported up front,
+every mode imports what it needs when it runs.
+"""
+
+import argparse
+import os
+import sys
+from parse import TREE_SOURCES
+from parse.export import EXPORTERS, get_exporter
+from parse.extract import ENGINES
+
+
+def add_scan_options(parser, project=True):
+    """
+    The options shared by every mode that reads the project files
+
+    :param parser: (argparse.ArgumentParser) the mode's parser
+    :param project: (bool) add --project, batch takes the projects as arguments
+    """
+    if project:
+        parser.add_argument('--project', default=os.path.dirname(os.getcwd()),
+                            help='the django project directory, the parent of the working directory by default')
+    parser.add_argument('--output', default=os.getcwd(),
+                        help='directory for the reports and the import cache, the working directory by default')
+    parser.add_argument('--engine', choices=list(ENGINES), default='line',
+                        help="'line' reads the import lines, 'ast' parses the files, "
+                             "'bytes' searches whole files for import lines, memory-mapping big ones")
+    parser.add_argument('--full-scan', action='store_true',
+                        help='read whole files instead of stopping after the imports at the top')
+    parser.add_argument('--no-cache', action='store_true', help='read every file, ignore the import cache')
+    parser.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                        help='also skip these directories and files, can be repeated')
+    parser.add_argument('--no-gitignore', action='store_true', help="scan the files .gitignore leaves out")
+
+
+def add_report_options(parser):
+    """
+    The options of the modes that write reports
+
+    :param parser: (argparse.ArgumentParser) the mode's parser
+    """
+    parser.add_argument('--workers', type=int, default=1, help='processes reading the project files')
+    parser.add_argument('--readers', type=int, default=0,
+                        help='files read at the same time by the asyncio pipeline, for network mounted projects')
+    parser.add_argument('--hash-contents', action='store_true',
+                        help='also compare file contents when the mtime changed')
+    parser.add_argument('--record-files', action='store_true', help='list the importing files in the reports')
+    parser.add_argument('--format', action='append', choices=list(EXPORTERS),
+                        help='report format, can be repeated, csv by default')
+    parser.add_argument('--stable-schema', action='store_true',
+                        help='write a single usage report with the same columns every run')
+    parser.add_argument('--tree-source', choices=list(TREE_SOURCES), default='metadata',
+                        help="where the dependencies come from, the installed distributions' metadata "
+                             "or 'pipdeptree -f > treefreeze.txt'")
+
+
+def make_check(args, instrument=None):
+    """
+    :param args: (argparse.Namespace) the parsed arguments of scan or watch
+    :param instrument: (Instrument) times the run
+    :return: (CheckParentDjangoDirectory) with the requirements parsed
+    """
+    from __init__ import CheckParentDjangoDirectory
+    from parse.walk import DEFAULT_EXCLUDES
+    # the reports and the import cache are written there
+    os.makedirs(args.output, exist_ok=True)
+    return CheckParentDjangoDirectory(chks_parent_dj_dir=os.path.abspath(args.output),
+                                      parent_dj_proj=os.path.abspath(args.project), workers=args.workers,
+                                      use_cache=not args.no_cache, hash_contents=args.hash_contents,
+                                      engine=args.engine, full_scan=args.full_scan,
+                                      record_files=args.record_files,
+                                      excludes=DEFAULT_EXCLUDES + tuple(args.exclude),
+                                      use_gitignore=not args.no_gitignore, formats=tuple(args.format or ['csv']),
+                                      stable_schema=args.stable_schema, tree_source=args.tree_source,
+                                      readers=args.readers, instrument=instrument)
+
+
+def scan(args):
+    """
+    A full run, the requirements are parsed and the reports written
+
+    :param args: (argparse.Namespace) the parsed arguments
+    :return: (int) exit code
+    """
+    from parse.instrument import Instrument, JsonFileSink, PrintSink
+    sinks = [PrintSink()]
+    if args.stats_json:
+        sinks.append(JsonFileSink(args.stats_json))
+    instrument = Instrument(top_n=args.slowest, profile_path=args.profile, trace_memory=args.trace_memory,
+                            sinks=sinks)
+    check = make_check(args, instrument)
+    check.run()
+    if args.baseline:
+        from parse.diff import Baseline
+        Baseline.from_check(os.path.abspath(args.baseline), check).save()
+    return 0
+
+
+def diff(args):
+    """
+    Checks only the changed files against the baseline of a full run
+
+    :param args: (argparse.Namespace) the parsed arguments
+    :return: (int) exit code, 1 if the changes add an undeclared import or leave a requirement unused,
+        2 if there is no baseline for these settings
+    """
+    import time
+    from parse.diff import Baseline, DiffCheck, changed_paths, scan_settings
+    start = time.perf_counter()
+    baseline = Baseline(os.path.abspath(args.baseline), settings=scan_settings(args.engine, args.full_scan))
+    if not baseline.load():
+        print('No baseline made with --engine ' + args.engine + (' --full-scan' if args.full_scan else '')
+              + ' at ' + baseline.path + ', run scan --baseline first')
+        return 2
+    project = os.path.abspath(args.project)
+    changed = changed_paths(args.files or sys.stdin, os.path.abspath(args.root or project), project)
+    diff_check = DiffCheck(make_check(args), baseline)
+    rows = diff_check.run(changed)
+    for change, pkg, files in rows:
+        print(change + ' ' + pkg + (': ' + ', '.join(files) if files else ''))
+    diff_check.export()
+    print(str(len(changed)) + ' changed files, ' + str(len(diff_check.read)) + ' read'
+          + ' in {:.2f}s'.format(time.perf_counter() - start))
+    return 1 if diff_check.failed() else 0
+
+
+def watch(args):
+    """
+    Keeps the results live until Ctrl-C
+
+    :param args: (argparse.Namespace) the parsed arguments
+    :return: (int) exit code
+    """
+    from parse.watch import Watcher
+    watcher = Watcher(make_check(args), interval=args.interval, use_inotify=not args.no_inotify)
+    if watcher.use_inotify:
+        print('waiting for inotify events')
+    else:
+        print('polling every ' + str(args.interval) + 's')
+    watcher.run()
+    return 0
+
+
+def batch(args):
+    """
+    Scans every project and writes their reports and the combined ones
+
+    :param args: (argparse.Namespace) the parsed arguments
+    :return: (int) exit code, 1 if a project could not be scanned
+    """
+    from batch import Batch
+    from parse.walk import DEFAULT_EXCLUDES
+    runner = Batch(args.projects, args.output, workers=args.workers, threads=args.threads,
+                   formats=tuple(args.format or ['csv']), stable_schema=args.stable_schema,
+                   use_cache=not args.no_cache, hash_contents=args.hash_contents, engine=args.engine,
+                   full_scan=args.full_scan, record_files=args.record_files,
+                   excludes=DEFAULT_EXCLUDES + tuple(args.exclude), use_gitignore=not args.no_gitignore,
+                   tree_source=args.tree_source, readers=args.readers)
+    runner.run()
+    return 1 if runner.failed else 0
+
+
+def explain(args):
+    """
+    Prints why a package is or is not used
+
+    :param args: (argparse.Namespace) the parsed arguments
+    :return: (int) exit code, 0 if it is imported or needed by a used requirement, 1 if not
+    """
+    check = make_check(args)
+    check.scan()
+    needed = False
+    for package in check.explain(args.package):
+        requirements = ', '.join(req for req, _ in package['requirements'])
+        print(package['name'] + (' (requirement ' + requirements + ')' if requirements else '') + ': '
+              + package['status'])
+        files = package['files']
+        if files:
+            print('  imported by ' + str(len(files)) + ' files')
+            for f_name, line in files[:args.limit] if args.limit else files:
+                print('    ' + f_name + ':' + str(line))
+        if len(package['provided_by']) > 1:
+            print('  installed by ' + ', '.join(package['provided_by']))
+        for req, used in package['required_by']:
+            print('  dependency of ' + req + (' (used)' if used else ' (unused)'))
+        needed = needed or package['status'] != 'unused' and package['status'] != 'not imported'
+    return 0 if needed else 1
+
+
+def query(args):
+    """
+    Prints the files importing a requirement
+
+    :param args: (argparse.Namespace) the parsed arguments
+    :return: (int) exit code, 0 if the requirement is used, 1 if not
+    """
+    from parse.query import find_importing_files, requirement_import_names
+    from parse.walk import DEFAULT_EXCLUDES
+    import_names = requirement_import_names(args.requirement, use_cache=not args.no_cache)
+    files = find_importing_files(os.path.abspath(args.project), import_names,
+                                 chks_parent_dj_dir=os.path.abspath(args.output), use_cache=not args.no_cache,
+                                 engine=args.engine, full_scan=args.full_scan,
+                                 excludes=DEFAULT_EXCLUDES + tuple(args.exclude), use_gitignore=not args.no_gitignore)
+    print(args.requirement + ' (import ' + ', '.join(import_names) + ') is '
+          + ('used by ' + str(len(files)) + ' files' if files else 'not used'))
+    for f_name in files[:args.limit] if args.limit else files:
+        print('  ' + f_name)
+    return 0 if files else 1
+
+
+def build_parser():
+    """
+    :return: (argparse.ArgumentParser) the parser of every mode
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    modes = parser.add_subparsers(dest='mode', metavar='mode')
+    modes.required = True
+
+    scan_parser = modes.add_parser('scan', help='write the requirements and not_in_requirements reports')
+    add_scan_options(scan_parser)
+    add_report_options(scan_parser)
+    scan_parser.add_argument('--slowest', type=int, default=10, help='how many of the slowest files to list')
+    scan_parser.add_argument('--stats-json', help='append the stage timings of the run to this json lines file')
+    scan_parser.add_argument('--profile', help='write cProfile stats to this file')
+    scan_parser.add_argument('--trace-memory', action='store_true', help='report the peak memory (slower)')
+    scan_parser.add_argument('--baseline', help='also save the imports of every file and the counts here for diff')
+    scan_parser.set_defaults(run=scan)
+
+    watch_parser = modes.add_parser('watch', help='rewrite the reports whenever the results change')
+    add_scan_options(watch_parser)
+    add_report_options(watch_parser)
+    watch_parser.add_argument('--interval', type=float, default=1.0, help='seconds between polls')
+    watch_parser.add_argument('--no-inotify', action='store_true', help='poll even if inotify_simple is installed')
+    watch_parser.set_defaults(run=watch)
+
+    batch_parser = modes.add_parser('batch', help='scan many projects sharing this python environment')
+    batch_parser.add_argument('projects', nargs='+', help='the django project directories')
+    add_scan_options(batch_parser, project=False)
+    add_report_options(batch_parser)
+    batch_parser.add_argument('--threads', type=int, default=4, help='projects scanned at the same time')
+    batch_parser.set_defaults(run=batch)
+
+    explain_parser = modes.add_parser('explain', help='why a package is or is not used')
+    explain_parser.add_argument('package', help='import name or project name, yaml or PyYAML')
+    add_scan_options(explain_parser)
+    add_report_options(explain_parser)
+    explain_parser.add_argument('--limit', type=int, default=20, help='files to list, 0 for all')
+    explain_parser.set_defaults(run=explain)
+
+    diff_parser = modes.add_parser('diff', help='check only the changed files of a pull request against a baseline')
+    diff_parser.add_argument('files', nargs='*', help='the changed files, read from stdin if there are none')
+    diff_parser.add_argument('--baseline', required=True, help='the file scan --baseline saved')
+    diff_parser.add_argument('--root', help='the directory the changed files are relative to, '
+                                            'the git top level, the project by default')
+    add_scan_options(diff_parser)
+    add_report_options(diff_parser)
+    diff_parser.set_defaults(run=diff)
+
+    query_parser = modes.add_parser('query', help='is one requirement imported by the project')
+    query_parser.add_argument('requirement', help='project name as written in requirements.txt')
+    add_scan_options(query_parser)
+    query_parser.add_argument('--limit', type=int, default=20, help='files to list, 0 for all')
+    query_parser.set_defaults(run=query)
+    return parser
+
+
+def main(argv=None):
+    """
+    :param argv: (list[str]) the arguments, sys.argv by default
+    :return: (int) exit code
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        for export_format in getattr(args, 'format', None) or ():
+            get_exporter(export_format)
+    except ImportError as error:
+        # parquet without pyarrow, a message instead of a traceback from the checker
+        parser.error(str(error))
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,6 @@
 from __init__ import CheckParentDjangoDirectory
+from parse.instrument import Instrument, JsonFileSink, PrintSink
+from parse.walk import DEFAULT_EXCLUDES
 import os
 
 
@@ -26,13 +28,75 @@ import os
 #       not_in_requirements-timestamp.csv
 #       requirements-timestamp.csv
 
+# SCAN SETTINGS:
+#   WORKERS: number of processes reading the project files
+#       1 reads every file on the main thread
+#       os.cpu_count() uses every core
+#   READERS: files read at the same time by the asyncio pipeline, 0 to use WORKERS
+#       for projects on network mounts (NFS, CI workspaces) where reads wait on the network
+#       e.g. 32
+#   USE_CACHE: only read files that changed since the last run
+#       the cache is kept in chks_parent_dj_dir/.import-cache-line-top.json, one file per ENGINE and FULL_SCAN
+#   HASH_CONTENTS: also compare file contents when the mtime changed
+#       useful when the project is checked out fresh for every run
+#   ENGINE: how imports are found in a file
+#       'line' reads the import lines, fast
+#       'ast' parses the file with python's ast module, always correct
+#           pair it with WORKERS = os.cpu_count() so it costs no extra time
+#       'bytes' searches the whole file for import lines without decoding the rest
+#           big files (generated migrations, fixtures) are memory-mapped, for projects full of them
+#   FULL_SCAN: read whole files instead of stopping after the imports at the top
+#       finds imports inside functions but reads every line
+#   RECORD_FILES: list the importing files in not_in_requirements-timestamp.csv
+#   EXCLUDES: glob patterns of directories and files that are not scanned
+#       matched against names and paths relative to the django project
+#       the project's .gitignore files are honoured too
+#       e.g. DEFAULT_EXCLUDES + ('migrations',)
+#   FORMATS: the files to write, any of 'csv', 'jsonl' and 'parquet' (needs pyarrow)
+#   STABLE_SCHEMA: write a single usage-timestamp file with the same columns every run
+#       requirements and undeclared imports with dependencies, file counts and files
+#   TREE_SOURCE: where the dependencies of the requirements come from
+#       'metadata' reads them from the installed distributions, nothing to prepare
+#       'treefreeze' reads ~/django/treefreeze.txt from 'pipdeptree -f > treefreeze.txt'
+# INSTRUMENTATION SETTINGS:
+#   SLOWEST_FILES: how many of the slowest files to list, 0 to not time files
+#   STATS_JSON: a file every run appends its stage timings to as a json line
+#   PROFILE: a file to write cProfile stats to (open with snakeviz or pstats)
+#   TRACE_MEMORY: report the peak memory and top allocation sites (slower)
+WORKERS = 1
+READERS = 0
+USE_CACHE = True
+HASH_CONTENTS = False
+ENGINE = 'line'
+FULL_SCAN = False
+RECORD_FILES = False
+EXCLUDES = DEFAULT_EXCLUDES
+FORMATS = ('csv',)
+STABLE_SCHEMA = False
+TREE_SOURCE = 'metadata'
+SLOWEST_FILES = 10
+STATS_JSON = None
+PROFILE = None
+TRACE_MEMORY = False
+
 
 if __name__ == '__main__':
     print('You are running me from the working directory of ' + os.getcwd())
     print("If your django project directory is ~/django,")
     print("You should be running 'python main.py'")
     print("from the ~/django/chks_parent_dj_dir.")
-    print("I am expecting there to be a ~/django/requirements.txt & a ~/django/treeparse.txt")
-    check = CheckParentDjangoDirectory(chks_parent_dj_dir=os.getcwd())
+    print("I am expecting there to be a ~/django/requirements.txt")
+    if TREE_SOURCE == 'treefreeze':
+        print("and a ~/django/treefreeze.txt")
+    sinks = [PrintSink()]
+    if STATS_JSON:
+        sinks.append(JsonFileSink(STATS_JSON))
+    instrument = Instrument(top_n=SLOWEST_FILES, profile_path=PROFILE, trace_memory=TRACE_MEMORY, sinks=sinks)
+    check = CheckParentDjangoDirectory(chks_parent_dj_dir=os.getcwd(), workers=WORKERS,
+                                       use_cache=USE_CACHE, hash_contents=HASH_CONTENTS,
+                                       engine=ENGINE, full_scan=FULL_SCAN,
+                                       record_files=RECORD_FILES, excludes=EXCLUDES,
+                                       formats=FORMATS, stable_schema=STABLE_SCHEMA, tree_source=TREE_SOURCE,
+                                       readers=READERS, instrument=instrument)
     check.run()
     print('program finished')
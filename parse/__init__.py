@@ -2,11 +2,16 @@
 A module for parsing files
 """
 
-import pandas as pd
 import os
+from .names import requirement_name
 from .util import Util
 import sys
 
+# where the dependencies of the requirements come from
+# metadata: the Requires-Dist of the installed distributions (parse/resolve.py)
+# treefreeze: treefreeze.txt written by 'pipdeptree -f > treefreeze.txt'
+TREE_SOURCES = ('metadata', 'treefreeze')
+
 
 class Parse:
     """
@@ -16,15 +21,16 @@ class Parse:
     ----------
     util : Util class
         a set of utility functions from the Util class
+        pass one in to share it or to point it at other site-packages
     symbs : list[str]
         a list of symbols that denote version numbers in a requirements.txt
     """
-    def __init__(self):
-        self.util = Util()
+    def __init__(self, util=None):
+        self.util = util if util is not None else Util()
         self.symbs = ["==", ">", ">=", "<", "<=", "~=", "~", "@"]
 
     @staticmethod
-    def read_file(proj, file_name):
+    def read_lines(proj, file_name):
         """
         Looks for files in the django parent directory.
         If file not found the script exits the run time and tells you
@@ -36,13 +42,12 @@ class Parse:
             Example: ~/django
         :param file_name: (str) The file being read
             One of treefreeze.txt or requirements.txt
-        :return: (pd.Series) a pandas Series of the lines of the file read.
+        :return: (list[str]) the lines of the file read.
         """
         path = os.path.join(proj, file_name)
         try:
             with open(path, 'r') as file:
-                lines = pd.Series([line for line in file])
-            return lines
+                return [line for line in file]
         # except FileNotFoundError: python3
         except OSError:
             print("I could not find the file " + file_name + ",")
@@ -55,10 +60,59 @@ class Parse:
             print("If this file already exists please move me to the above location.")
             sys.exit()
 
+    @staticmethod
+    def read_file(proj, file_name):
+        """
+        :param proj: (str) The django project parent directory
+        :param file_name: (str) The file being read
+            One of treefreeze.txt or requirements.txt
+        :return: (pd.Series) a pandas Series of the lines of the file read (read_lines).
+        """
+        # pandas is slow to import, only load it when the requirements are parsed
+        import pandas as pd
+        return pd.Series(Parse.read_lines(proj, file_name))
+
+    def requirement_names(self, proj):
+        """
+        Reads the requirements.txt without pandas
+        Blank lines, comments and pip options (-r, --index-url) are skipped (parse/names.py)
+        :param proj: (str) The django project parent directory
+        :return: (list[str]) the project names of the requirements
+            Django>=3.2 => django, python_dateutil==2.8.2 => python-dateutil,
+            celery[redis] => celery, -e git+https://...#egg=my_app => my-app
+        """
+        names = []
+        for line in self.read_lines(proj, 'requirements.txt'):
+            name = requirement_name(line)
+            if name is not None and name not in names:
+                names.append(name)
+        return names
+
+    def resolve(self, proj):
+        """
+        Finds the requirements and all their dependencies from the installed distributions,
+        no treefreeze.txt needed
+        :param proj: (str) The django project parent directory
+        :return: (list[tuple[str, str]]) (requirement, dependency) normalised project names (Util.resolve_packages)
+        """
+        return self.util.resolve_packages(self.requirement_names(proj))
+
+    @staticmethod
+    def tree_line_name(line):
+        """
+        :param line: (str) a line of treefreeze.txt
+        :return: (str) the normalised project name with the indent of the line kept, None if it has no name
+            '    python_dateutil==2.8.2\n' => '    python-dateutil'
+        """
+        name = requirement_name(line)
+        if name is None:
+            return None
+        return line[:len(line) - len(line.lstrip())] + name
+
     def requirements(self, proj):
         """
         Reads the requirements.txt to create a pandas dataframe to parse import statements
-        TODO: Make this work for installs from git
+        Comments, pip options and blank lines are dropped, installs from git need an #egg=name
         :param proj: (str) The django project parent directory
             Example: ~/django
         :return: (pd.Series) a pandas Series of the pkgs from the requirements.txt.
@@ -69,8 +123,8 @@ class Parse:
         # numpy>1.20,
         # scipy~=1.7.1
         # ]
-        pkg_names = reqs.apply(lambda requirement: self.util.find_requirements_name(requirement, self.symbs))  # parses the file
-        pkg_names = pkg_names.rename('pkg')  # sets the series names
+        pkg_names = reqs.apply(requirement_name)  # parses the file, None for lines without a name
+        pkg_names = pkg_names.dropna().drop_duplicates().reset_index(drop=True).rename('pkg')  # sets the series names
         # [
         # pandas,
         # numpy,
@@ -85,6 +139,7 @@ class Parse:
             Example: ~/django
         :return: (pd.Series) a pandas Series of the pkgs from the treefreeze.txt.
         """
+        import pandas as pd
         reqs = self.requirements(proj)  # parses the requirements.txt for names
         tree_file = self.read_file(proj, 'treefreeze.txt')  # pd.Series of the treefreeze.txt
         # [
@@ -94,7 +149,7 @@ class Parse:
         #       six @ file:///tmp/build/80754af9/six_1623709665295/work,
         #   pytz==2021.3
         # ]
-        pkg_names = tree_file.apply(lambda requirement: self.util.find_requirements_name(requirement, self.symbs))  # parses the requirements.txt for names
+        pkg_names = tree_file.apply(self.tree_line_name)  # parses the treefreeze.txt for names
         # [
         #  pandas
         #   numpy,
@@ -102,12 +157,12 @@ class Parse:
         #       six,
         #   pytz
         # ]
-        pkg_names = pkg_names.rename('pkg')  # sets series name
+        pkg_names = pkg_names.dropna().reset_index(drop=True).rename('pkg')  # sets series name
         # pipdeptree does not include pkgs without dependencies
         # find these within the requirements.txt
         not_in_tree_file = reqs[~reqs.isin(pkg_names)]
         # add them to the tree output
-        pkg_names = pkg_names.append(not_in_tree_file)
+        pkg_names = pd.concat([pkg_names, not_in_tree_file], ignore_index=True)
         # this is a list of either
         # requirements with don't have a leading tab
         # or a dependency which do have a leading tab
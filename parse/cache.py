@@ -0,0 +1,244 @@
+"""
+A module for caching the imports of project files
+and the facts about the python environment between runs
+"""
+
+import hashlib
+import json
+import os
+
+
+def cache_home():
+    """
+    The directory for caches that belong to the python environment, not a project
+    ($XDG_CACHE_HOME/chks_parent_dj_dir, ~/.cache/chks_parent_dj_dir by default)
+
+    :return: (str) directory, created if it does not exist
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    path = os.path.join(base, 'chks_parent_dj_dir')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def environment_key(site_dirs):
+    """
+    A directory's mtime changes whenever an entry is added, removed or renamed in it,
+    so installing, upgrading or removing a package changes the key.
+
+    :param site_dirs: (list[str]) site-packages directories
+    :return: (dict[str, int]) directory => mtime_ns, 0 if it does not exist
+    """
+    key = {}
+    for site_dir in site_dirs:
+        try:
+            key[site_dir] = os.stat(site_dir).st_mtime_ns
+        except OSError:
+            key[site_dir] = 0
+    return key
+
+
+def scan_settings(engine, full_scan):
+    """
+    :param engine: (str) import engine (parse/extract.py)
+    :param full_scan: (bool) whole files were read
+    :return: (str) line-top, ast-full ...
+    """
+    return engine + ('-full' if full_scan else '-top')
+
+
+def load_json(path):
+    """
+    :param path: (str) json file
+    :return: (dict) its contents, empty if it is missing or broken
+    """
+    try:
+        with open(path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_json(path, data):
+    """
+    Writes a json file, replacing the old one in one step
+    so an interrupted run never leaves half a cache behind.
+
+    :param path: (str) json file
+    :param data: (dict) contents
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(data, file, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def file_digest(f_name):
+    """
+    :param f_name: (str) filename
+    :return: (str) sha1 of the file contents
+    """
+    sha = hashlib.sha1()
+    with open(f_name, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 16), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class ImportCache:
+    """
+    An on disk cache of the package names imported by each project file.
+    A file is only read again when its mtime or size changed.
+
+    With hash_contents a file whose mtime or size changed
+    but whose contents did not (fresh git checkouts, touch)
+    is still a hit. The hash is only computed for those files.
+
+    Attributes
+    ----------
+    path : str
+        the json file the cache is stored in
+    root : str
+        the django project directory, files are keyed relative to it
+    hash_contents : bool
+        compare a sha1 of the contents when the mtime or size changed
+    settings : str
+        how the imports were extracted, a cache made with other settings is thrown away
+    files : dict[str, list]
+        relative path => [mtime_ns, size, sha1 or None, {package name: line of its first import}]
+    hits : int
+        files whose imports came from the cache this run
+    misses : int
+        files that had to be read this run
+    removed : int
+        entries dropped because the file no longer exists
+    """
+    version = 3
+
+    def __init__(self, path, root, hash_contents=False, settings=''):
+        self.path = path
+        self.root = root
+        self.hash_contents = hash_contents
+        self.settings = settings
+        self.files = {}
+        self.hits = 0
+        self.misses = 0
+        self.removed = 0
+        self._stats = {}
+        self._prefix = os.path.join(root, '')
+
+    @classmethod
+    def in_directory(cls, directory, root, engine='line', full_scan=False, hash_contents=False):
+        """
+        Each settings has its own file, a query with another engine leaves the cache of the scans alone
+
+        :param directory: (str) where the cache is kept, chks_parent_dj_dir
+        :param root: (str) the django project directory
+        :param engine: (str) import engine (parse/extract.py)
+        :param full_scan: (bool) whole files are read
+        :param hash_contents: (bool) compare a sha1 of the contents when the mtime or size changed
+        :return: (ImportCache) not loaded yet, directory/.import-cache-line-top.json ...
+        """
+        settings = scan_settings(engine, full_scan)
+        path = os.path.join(directory, '.import-cache-' + settings + '.json')
+        return cls(path, root, hash_contents=hash_contents, settings=settings)
+
+    def load(self):
+        """
+        Reads the cache file. A missing, broken or outdated cache starts empty.
+        """
+        data = load_json(self.path)
+        if data.get('version') == self.version and data.get('settings') == self.settings:
+            self.files = data.get('files', {})
+
+    def save(self):
+        """
+        Writes the cache file
+        """
+        save_json(self.path, {'version': self.version, 'settings': self.settings, 'files': self.files})
+
+    def key(self, f_name):
+        """
+        :param f_name: (str) filename
+        :return: (str) the filename relative to the project
+        """
+        if f_name.startswith(self._prefix):
+            return f_name[len(self._prefix):]
+        return os.path.relpath(f_name, self.root)
+
+    def get(self, f_name):
+        """
+        :param f_name: (str) filename
+        :return: (dict[str, int]) the cached package names and lines, None if the file has to be read
+        """
+        pkgs, stat = self.lookup(f_name)
+        self.record(f_name, pkgs, stat)
+        return pkgs
+
+    def lookup(self, f_name):
+        """
+        The file system part of get, it counts nothing
+        so the reader threads of the asyncio pipeline can call it (parse/pipeline.py)
+
+        :param f_name: (str) filename
+        :return: (tuple[dict[str, int], tuple]) the cached package names and lines, None if the file has to be read,
+            and its (mtime_ns, size, sha1 or None) for record
+        """
+        stat = os.stat(f_name)
+        entry = self.files.get(self.key(f_name))
+        digest = None
+        if entry is not None:
+            if entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                return dict(entry[3]), None
+            if self.hash_contents and entry[2] is not None:
+                digest = file_digest(f_name)
+                if digest == entry[2]:
+                    entry[0] = stat.st_mtime_ns
+                    entry[1] = stat.st_size
+                    return dict(entry[3]), None
+        # stat before reading, if the file changes while it is read
+        # the next run sees a different mtime and reads it again
+        return None, (stat.st_mtime_ns, stat.st_size, digest)
+
+    def record(self, f_name, pkgs, stat):
+        """
+        Counts a lookup, a miss is remembered for put
+
+        :param f_name: (str) filename
+        :param pkgs: (dict[str, int]) what lookup returned
+        :param stat: (tuple) what lookup returned
+        """
+        if pkgs is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._stats[self.key(f_name)] = stat
+
+    def put(self, f_name, pkgs):
+        """
+        :param f_name: (str) filename that missed the cache
+        :param pkgs: (dict[str, int]) the package names and lines read from it
+        """
+        key = self.key(f_name)
+        mtime_ns, size, digest = self._stats.pop(key)
+        if self.hash_contents and digest is None:
+            digest = file_digest(f_name)
+        self.files[key] = [mtime_ns, size, digest, dict(sorted(pkgs.items()))]
+
+    def prune(self, f_names):
+        """
+        Drops the entries of files that were not part of this run (deleted files)
+
+        :param f_names: (list[str]) every file of this run
+        """
+        keep = set(self.key(f_name) for f_name in f_names)
+        for key in [key for key in self.files if key not in keep]:
+            del self.files[key]
+            self.removed += 1
+
+    def report(self):
+        """
+        prints the hit and miss counts
+        """
+        print('import cache: ' + str(self.hits) + ' hits, ' + str(self.misses) + ' misses, '
+              + str(self.removed) + ' removed')
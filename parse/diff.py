@@ -0,0 +1,268 @@
+"""
+A module for checking only the files a pull request changed
+
+A full run saves a baseline, the imports of every file and the reference counts.
+A diff run restores the counts from it, forgets the old imports of the changed files,
+reads them again and reports what changed:
+imports that are not in the requirements (the standard library and the project's own packages left out)
+and requirements no file imports any more.
+Only the changed files are read, so the check takes time in proportion to the diff.
+
+    python cli.py scan --baseline baseline.json
+    git diff --name-only origin/main... | python cli.py diff --baseline baseline.json
+"""
+
+import os
+import sys
+from collections import Counter
+from .cache import load_json, save_json, scan_settings
+from .export import DIFF_COLUMNS, get_exporter
+from .walk import is_walked
+
+# a pull request adding one of these fails the check
+UNDECLARED_IMPORT = 'undeclared_import'
+REQUIREMENT_UNUSED = 'requirement_unused'
+# reported, but fine
+REQUIREMENT_USED = 'requirement_used'
+FAILING = (UNDECLARED_IMPORT, REQUIREMENT_UNUSED)
+# never declared in requirements.txt, python before 3.10 only knows the compiled in modules
+STDLIB_NAMES = frozenset(getattr(sys, 'stdlib_module_names', sys.builtin_module_names))
+
+
+def changed_paths(lines, root, project):
+    """
+    :param lines: (iterable[str]) changed paths, one per line like git diff --name-only
+    :param root: (str) the directory the paths are relative to, the git top level
+    :param project: (str) the django project directory
+    :return: (list[str]) the changed py files inside the project, relative to it and / separated
+    """
+    paths = []
+    for line in lines:
+        line = line.strip()
+        if not line.endswith('.py'):
+            continue
+        rel_path = os.path.relpath(os.path.join(root, line), project)
+        if rel_path.startswith('..'):
+            continue
+        rel_path = rel_path.replace(os.sep, '/')
+        if rel_path not in paths:
+            paths.append(rel_path)
+    return paths
+
+
+def first_party_names(project):
+    """
+    :param project: (str) the django project directory
+    :return: (set[str]) the packages and modules at its top level, the apps, settings and manage
+    """
+    names = set()
+    for entry in os.scandir(project):
+        if entry.is_dir() and os.path.isfile(os.path.join(entry.path, '__init__.py')):
+            names.add(entry.name)
+        elif entry.is_file() and entry.name.endswith('.py'):
+            names.add(entry.name[:-3])
+    return names
+
+
+class Baseline:
+    """
+    The imports of every file and the reference counts of a full run
+
+    Attributes
+    ----------
+    path : str
+        the json file the baseline is stored in
+    settings : str
+        how the imports were extracted, a diff run with other settings is refused
+    requirements : list[str]
+        the requirements of the run, normalised project names
+    files : dict[str, dict[str, int]]
+        path relative to the project, / separated => package names it imports and their lines
+    counts : dict[str, int]
+        requirement => number of files importing any of its import names
+    not_in_req : dict[str, int]
+        package that is not in the requirements => number of files importing it
+    """
+    version = 3
+
+    def __init__(self, path, settings=''):
+        self.path = path
+        self.settings = settings
+        self.requirements = []
+        self.files = {}
+        self.counts = {}
+        self.not_in_req = {}
+
+    @classmethod
+    def from_check(cls, path, check):
+        """
+        :param path: (str) the json file to store it in
+        :param check: (CheckParentDjangoDirectory) after scan(), every file attributed
+        :return: (Baseline)
+        """
+        baseline = cls(path, settings=scan_settings(check.engine, check.full_scan))
+        baseline.requirements = sorted(check.req.rows)
+        attribution = check.attribution
+        for pkg, (f_ids, lines) in sorted(attribution.hits.items()):
+            for f_id, line in zip(f_ids, lines):
+                rel_path = os.path.relpath(attribution.paths[f_id], check.parent_dj_proj).replace(os.sep, '/')
+                baseline.files.setdefault(rel_path, {})[pkg] = line
+        baseline.files = dict(sorted(baseline.files.items()))
+        baseline.counts = dict(sorted(check.req.counts.items()))
+        baseline.not_in_req = dict(sorted(check.not_in_req.items()))
+        return baseline
+
+    def load(self):
+        """
+        :return: (bool) False if the file is missing, broken or was written with other settings
+        """
+        data = load_json(self.path)
+        if data.get('version') != self.version or data.get('settings') != self.settings:
+            return False
+        self.requirements = data.get('requirements', [])
+        self.files = data.get('files', {})
+        self.counts = data.get('counts', {})
+        self.not_in_req = data.get('not_in_req', {})
+        return True
+
+    def save(self):
+        """
+        Writes the baseline file
+        """
+        save_json(self.path, {'version': self.version, 'settings': self.settings,
+                              'requirements': self.requirements, 'counts': self.counts,
+                              'not_in_req': self.not_in_req, 'files': self.files})
+        print('baseline of ' + str(len(self.files)) + ' files saved to ' + self.path)
+
+
+class DiffCheck:
+    """
+    Applies the changed files to the counts of a baseline and reports the delta
+
+    Attributes
+    ----------
+    check : CheckParentDjangoDirectory
+        a checker that has not been run, its requirements are the ones of the pull request
+    baseline : Baseline
+        the loaded baseline of a full run
+    changed : list[str]
+        the changed py files, relative to the project
+    read : list[str]
+        the changed files that exist and are scanned, the others were deleted or are excluded
+    rows : list[tuple[str, str, list[str]]]
+        (change, package, path:line of the changed files importing it) after run
+    ignored : frozenset[str]
+        imports that are never undeclared, the standard library and the project's own packages
+    """
+    def __init__(self, check, baseline):
+        self.check = check
+        self.baseline = baseline
+        self.changed = []
+        self.read = []
+        self.rows = []
+        self.ignored = STDLIB_NAMES.union(first_party_names(check.parent_dj_proj))
+
+    def undeclared(self, pkgs):
+        """
+        :param pkgs: (iterable[str]) package names imported by a file
+        :return: (set[str]) the ones that are not requirements, the standard library or the project's own
+        """
+        return set(pkgs) - self.check.req.names - self.ignored
+
+    def restore(self):
+        """
+        Puts the counts of the baseline into the checker.
+        When the pull request changed the requirements the counts are
+        marked again from the imports of the baseline, still without reading a file.
+        """
+        check = self.check
+        if self.baseline.requirements == sorted(check.req.rows):
+            check.req.restore(self.baseline.counts)
+            check.not_in_req = Counter(self.baseline.not_in_req)
+            return
+        print('the requirements changed since the baseline, counting its imports again')
+        for rel_path, pkgs in self.baseline.files.items():
+            check.parse_project_file(pkgs, os.path.join(check.parent_dj_proj, rel_path))
+
+    def apply(self, changed):
+        """
+        :param changed: (list[str]) changed py files relative to the project, / separated
+        :return: (list[str]) the packages the changed files now import but do not declare
+        """
+        check = self.check
+        self.changed = changed
+        self.read = [rel_path for rel_path in changed
+                     if is_walked(check.parent_dj_proj, rel_path, excludes=check.excludes,
+                                  use_gitignore=check.use_gitignore, max_depth=check.max_depth,
+                                  skip_dirs=[check.chks_parent_dj_dir])]
+        for rel_path in changed:
+            old = self.baseline.files.get(rel_path)
+            if old:
+                check.forget_project_file(old, os.path.join(check.parent_dj_proj, rel_path))
+        f_names = [os.path.join(check.parent_dj_proj, rel_path) for rel_path in self.read]
+        undeclared = []
+        for rel_path, f_name, pkgs in zip(self.read, f_names, check.extract_imports(f_names)):
+            if not pkgs:
+                continue
+            check.parse_project_file(pkgs, f_name)
+            # whatever else the file imports, a django file always imports django
+            added = self.undeclared(pkgs) - self.undeclared(self.baseline.files.get(rel_path) or {})
+            undeclared.extend(pkg for pkg in sorted(added) if pkg not in undeclared)
+        return undeclared
+
+    def files_of(self, pkg):
+        """
+        :param pkg: (str) package name
+        :return: (list[str]) path:line of the changed files importing it
+        """
+        return [os.path.relpath(f_name, self.check.parent_dj_proj) + ':' + str(line)
+                for f_name, line in self.check.attribution.files(pkg)]
+
+    def requirement_files(self, name):
+        """
+        :param name: (str) requirement
+        :return: (list[str]) path:line of the changed files importing any of its import names
+        """
+        return [f_name for import_name in self.check.req.import_names[name] for f_name in self.files_of(import_name)]
+
+    def run(self, changed):
+        """
+        :param changed: (list[str]) changed py files relative to the project, / separated
+        :return: (list[tuple[str, str, list[str]]]) the rows, see rows
+        """
+        check = self.check
+        self.restore()
+        undeclared = self.apply(changed)
+        # new to the project, like the imports of a requirement the pull request dropped
+        for pkg in sorted(self.undeclared(check.not_in_req)):
+            if pkg not in self.baseline.not_in_req and pkg not in undeclared:
+                undeclared.append(pkg)
+        self.rows = [(UNDECLARED_IMPORT, pkg, self.files_of(pkg)) for pkg in sorted(undeclared)]
+        baseline_used = set(name for name, count in self.baseline.counts.items() if count > 0)
+        baseline_names = set(self.baseline.requirements)
+        for name in sorted(check.req.rows):
+            used = name in check.req.used_names
+            if not used and (name in baseline_used or name not in baseline_names):
+                # lost its last import, or added to the requirements without one
+                self.rows.append((REQUIREMENT_UNUSED, name, []))
+            elif used and name not in baseline_used:
+                self.rows.append((REQUIREMENT_USED, name, self.requirement_files(name)))
+        if check.cache is not None and check.cache.misses:
+            check.cache.save()
+        return self.rows
+
+    def export(self):
+        """
+        Writes diff-now.csv (and the other formats of the checker) next to the reports
+        """
+        for export_format in self.check.formats:
+            exporter = get_exporter(export_format)
+            path = os.path.join(self.check.chks_parent_dj_dir, 'diff-' + self.check.now + '.' + exporter.extension)
+            print('exporting to ' + path)
+            exporter.write(path, DIFF_COLUMNS, self.rows)
+
+    def failed(self):
+        """
+        :return: (bool) True if the pull request adds an undeclared import or an unused requirement
+        """
+        return any(change in FAILING for change, _, _ in self.rows)
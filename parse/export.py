@@ -0,0 +1,139 @@
+"""
+A module for writing the results of a scan
+
+Every exporter takes the columns of a table and an iterable of rows
+and writes them out in chunks, so no DataFrame is built for the export.
+"""
+
+import csv
+import json
+
+# rows are written in chunks of this many
+CHUNK_ROWS = 10000
+
+# (column, type) type is one of str, int, list
+# req and dep are normalised project names, import_count is the number of files importing the req
+REQUIREMENT_COLUMNS = [('req', 'str'), ('dep', 'str'), ('used', 'int'), ('import_count', 'int')]
+NOT_IN_REQUIREMENT_COLUMNS = [('pkg', 'str'), ('file_count', 'int')]
+# what a pull request changed (parse/diff.py), files are path:line
+DIFF_COLUMNS = [('change', 'str'), ('pkg', 'str'), ('files', 'list')]
+# one table with the same columns every run, for loading run history
+USAGE_COLUMNS = [
+    ('run', 'str'),  # timestamp of the run
+    ('pkg', 'str'),  # project name of a requirement, import name of an undeclared import
+    ('kind', 'str'),  # requirement or not_in_requirements
+    ('deps', 'list'),  # project names of the dependencies of a requirement
+    ('used', 'int'),  # 1 if imported by the project
+    ('file_count', 'int'),  # number of files importing it
+    ('files', 'list'),  # the files importing it, if recorded
+]
+
+
+def chunks(rows, size=CHUNK_ROWS):
+    """
+    :param rows: (iterable[tuple]) rows
+    :param size: (int) rows per chunk
+    :return: (generator[list[tuple]]) lists of at most size rows
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Exporter:
+    """
+    Base class of the exporters
+
+    Attributes
+    ----------
+    extension : str
+        file extension of the written files
+    """
+    extension = ''
+
+    def write(self, path, columns, rows):
+        """
+        :param path: (str) file to write
+        :param columns: (list[tuple[str, str]]) (name, type) of each column
+        :param rows: (iterable[tuple]) the rows, one value per column
+        """
+        raise NotImplementedError
+
+
+class CsvExporter(Exporter):
+    """
+    Writes a csv with a header row, lists are joined with ;
+    """
+    extension = 'csv'
+
+    def write(self, path, columns, rows):
+        lists = [i for i, (_, kind) in enumerate(columns) if kind == 'list']
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file, lineterminator='\n')
+            writer.writerow([name for name, _ in columns])
+            for chunk in chunks(rows):
+                if lists:
+                    chunk = [tuple(';'.join(value) if i in lists else value for i, value in enumerate(row))
+                             for row in chunk]
+                writer.writerows(chunk)
+
+
+class JsonLinesExporter(Exporter):
+    """
+    Writes one json object per row
+    """
+    extension = 'jsonl'
+
+    def write(self, path, columns, rows):
+        names = [name for name, _ in columns]
+        with open(path, 'w') as file:
+            for chunk in chunks(rows):
+                file.write(''.join(json.dumps(dict(zip(names, row))) + '\n' for row in chunk))
+
+
+class ParquetExporter(Exporter):
+    """
+    Writes a parquet file with one row group per chunk, needs pyarrow
+    """
+    extension = 'parquet'
+
+    def __init__(self):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("The parquet export needs pyarrow, run 'pip install pyarrow'")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+
+    def write(self, path, columns, rows):
+        types = {'str': self.pa.string(), 'int': self.pa.int64(), 'list': self.pa.list_(self.pa.string())}
+        schema = self.pa.schema([(name, types[kind]) for name, kind in columns])
+        with self.pq.ParquetWriter(path, schema) as writer:
+            for chunk in chunks(rows):
+                data = {name: [row[i] for row in chunk] for i, (name, _) in enumerate(columns)}
+                writer.write_table(self.pa.Table.from_pydict(data, schema=schema))
+
+
+EXPORTERS = {
+    'csv': CsvExporter,
+    'jsonl': JsonLinesExporter,
+    'parquet': ParquetExporter,
+}
+
+
+def get_exporter(name):
+    """
+    :param name: (str) one of EXPORTERS
+    :return: (Exporter)
+    """
+    try:
+        exporter = EXPORTERS[name]
+    except KeyError:
+        raise ValueError('Unknown export format ' + repr(name) + ', expected one of ' + ', '.join(EXPORTERS))
+    return exporter()
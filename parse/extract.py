@@ -0,0 +1,384 @@
+"""
+A module for extracting the imported package names from project files
+
+These are plain functions so they can be sent to worker processes.
+Every engine returns the package names with the line of their first import,
+{'django': 3, 'numpy': 5}, the lines explain where a package is used.
+"""
+
+import ast
+import io
+import mmap
+import os
+import re
+import time
+
+IMPORT_KEYWORDS = ('import ', 'import\t', 'from ', 'from\t')
+# statements that can sit between the imports at the top of a file
+# try:
+#     import json
+# except ImportError:
+#     import simplejson as json
+TOP_LEVEL_BLOCKS = ('try:', 'except', 'else:', 'finally:', 'if ', 'elif ')
+# a top level string statement, skipped like a docstring
+# """Module docstring.""", 'Module docstring.', r'''raw''', u"unicode"
+STRING_START = re.compile(r'[rRuUbBfF]{0,2}("""|\'\'\'|"|\')')
+# files this big or bigger are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 1 << 20
+# a line that starts an absolute import statement, matched on the raw bytes
+# import os, numpy as np
+# import a, \
+# from django.db import models
+# relative imports are not matched, they are dropped anyway
+IMPORT_NAME = rb'[A-Za-z_][\w.]*(?:[ \t]+as[ \t]+\w+)?'
+IMPORT_LINE = re.compile(rb'^[ \t]*(?:import[ \t]+' + IMPORT_NAME + rb'(?:[ \t]*,[ \t]*' + IMPORT_NAME + rb')*'
+                         rb'(?:[ \t]*,)?[ \t]*(?:[;#\\][^\n]*)?|from[ \t]+[A-Za-z_][\w.]*[ \t]+import\b[^\n]*)\r?$',
+                         re.M)
+
+
+def import_names(statement):
+    """
+    removes excess words only keep package names
+
+    :param statement: (str) stripped import statement, continuation lines joined
+    :return: (list[str]) the top level package names, relative imports are dropped
+    """
+    # from numpy import add => ["from", "numpy", "import", "add"]
+    # from django.db import blah => ["from", "django.db", "import", "blah"]
+    # from .lint import Lint => ["from", ".lint", "import", "Lint"]
+    # import numpy as np, os.path => ["numpy as np", "os.path"]
+    statement = statement.split('#', 1)[0]
+    if statement.startswith('from'):
+        tokens = statement.split()
+        if len(tokens) < 2 or tokens[1].startswith('.'):
+            return []
+        # django.db => django
+        return [tokens[1].split('.')[0]]
+    names = []
+    for alias in statement[len('import'):].replace('\\', ' ').split(','):
+        words = alias.split()
+        if words:
+            names.append(words[0].split('.')[0])
+    return names
+
+
+def add_imports(pkgs, names, line):
+    """
+    :param pkgs: (dict[str, int]) package name => line of its first import, updated in place
+    :param names: (iterable[str]) package names imported on the line
+    :param line: (int) line number, 1 based
+    """
+    for name in names:
+        if name not in pkgs or line < pkgs[name]:
+            pkgs[name] = line
+
+
+def count_lines(source, start, end):
+    """
+    Counts the newlines between two offsets in steps of MMAP_THRESHOLD,
+    so a mapped file is never copied whole
+
+    :param source: (bytes or mmap.mmap) file contents
+    :param start: (int) first offset
+    :param end: (int) offset after the last byte counted
+    :return: (int) number of newlines
+    """
+    count = 0
+    while start < end:
+        step = min(end, start + MMAP_THRESHOLD)
+        count += source[start:step].count(b'\n')
+        start = step
+    return count
+
+
+def map_source(file):
+    """
+    :param file: (file) a file opened in binary mode
+    :return: (bytes or mmap.mmap) the contents, memory-mapped for files of MMAP_THRESHOLD and up
+        so only the pages that are looked at are loaded and the OS can drop them again
+    """
+    size = os.fstat(file.fileno()).st_size
+    if size < MMAP_THRESHOLD:
+        return file.read()
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def grep_imports(f_name, full_scan=True):
+    """
+    The bytes engine.
+    Finds the import lines of the whole file with a bytes regular expression,
+    only those lines are decoded. Big files are memory-mapped so the memory
+    it takes does not grow with the file (generated migrations, fixture modules).
+    Files without the word import are skipped after a single find.
+    Import lines inside docstrings are counted, like the line engine with full_scan.
+
+    :param f_name: (str) filename
+    :param full_scan: (bool) unused, the whole file is always searched
+    :return: (dict[str, int]) the top level package names and the line of their first import
+    """
+    with open(f_name, 'rb') as file:
+        source = map_source(file)
+    try:
+        return grep_source(source)
+    finally:
+        if isinstance(source, mmap.mmap):
+            source.close()
+
+
+def grep_source(source):
+    """
+    The bytes engine on contents that were already read (parse/pipeline.py)
+
+    :param source: (bytes or mmap.mmap) file contents
+    :return: (dict[str, int]) the top level package names and the line of their first import
+    """
+    pkgs = {}
+    if source.find(b'import') == -1:
+        return pkgs
+    line_no = 1
+    counted = 0
+    for match in IMPORT_LINE.finditer(source):
+        line_no += count_lines(source, counted, match.start())
+        counted = match.start()
+        line = match.group().rstrip()
+        end = match.end()
+        # import a, \
+        #     b
+        while line.endswith(b'\\') and end < len(source):
+            next_end = source.find(b'\n', end + 1)
+            if next_end == -1:
+                next_end = len(source)
+            line = line[:-1] + b' ' + source[end + 1:next_end].strip()
+            end = next_end
+        for statement in line.decode('utf-8', 'replace').split(';'):
+            statement = statement.strip()
+            if statement.startswith(IMPORT_KEYWORDS):
+                add_imports(pkgs, import_names(statement), line_no)
+    return pkgs
+
+
+def scan_imports(f_name, full_scan=False):
+    """
+    The line engine.
+    Streams a file line by line and collects the packages it imports.
+    Imports live at the top of a file so the scan stops at the first
+    top level line that is not an import, comment, docstring or
+    try/if block around imports.
+
+    :param f_name: (str) filename
+    :param full_scan: (bool) read the whole file, imports inside functions are found too
+    :return: (dict[str, int]) the top level package names and the line of their first import
+    """
+    with open(f_name, 'r', encoding='utf-8', errors='replace') as file:
+        return scan_lines(file, full_scan=full_scan)
+
+
+def scan_lines(lines, full_scan=False):
+    """
+    The line engine on an iterable of lines, an open file or the decoded contents (parse/pipeline.py)
+
+    :param lines: (iterable[str]) the lines of a file
+    :param full_scan: (bool) read every line, imports inside functions are found too
+    :return: (dict[str, int]) the top level package names and the line of their first import
+    """
+    pkgs = {}
+    docstring = None  # the closing quotes while inside a docstring
+    continued = None  # the closing ) or \\ of a multi line import
+    statement = ''
+    start = 0  # the line a multi line import started on
+    for line_no, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if docstring is not None:
+            if docstring in stripped:
+                docstring = None
+            continue
+        if continued is not None:
+            statement += ' ' + stripped
+            if (continued == ')' and ')' in stripped) or (continued == '\\' and not stripped.endswith('\\')):
+                continued = None
+                add_imports(pkgs, import_names(statement), start)
+            continue
+        if not stripped or stripped.startswith('#'):
+            continue
+        if stripped.startswith(IMPORT_KEYWORDS):
+            # import os; import sys
+            for statement in stripped.split(';'):
+                statement = statement.strip()
+                if statement.startswith(IMPORT_KEYWORDS):
+                    add_imports(pkgs, import_names(statement), line_no)
+            start = line_no
+            # from django.db import (
+            #     models,
+            # )
+            if stripped.endswith('\\'):
+                continued = '\\'
+            elif '(' in stripped and ')' not in stripped:
+                continued = ')'
+            continue
+        if full_scan or line[0] in ' \t':
+            # indented lines are inside a try/if block
+            continue
+        string = STRING_START.match(stripped)
+        if string is not None:
+            quotes = string.group(1)
+            if len(quotes) == 3 and stripped.count(quotes) == 1:
+                docstring = quotes
+            continue
+        if stripped.startswith(TOP_LEVEL_BLOCKS):
+            continue
+        break
+    return pkgs
+
+
+def parse_imports(f_name, full_scan=True):
+    """
+    The ast engine.
+    Parses the whole file and visits every Import and ImportFrom node,
+    so imports spread over lines or nested in blocks are always right.
+    Relative imports (level > 0) are dropped.
+    Falls back to the line engine for files python can not parse (python 2 syntax).
+
+    :param f_name: (str) filename
+    :param full_scan: (bool) unused, the whole file is always parsed
+    :return: (dict[str, int]) the top level package names and the line of their first import
+    """
+    pkgs = {}
+    with open(f_name, 'rb') as file:
+        source = map_source(file)
+        # no need to build a tree for files without a single import
+        if source.find(b'import') == -1:
+            return pkgs
+        if isinstance(source, mmap.mmap):
+            # the tree needs all of it
+            source.close()
+            file.seek(0)
+            source = file.read()
+    return parse_source(source, f_name=f_name)
+
+
+def parse_source(source, f_name='<unknown>'):
+    """
+    The ast engine on contents that were already read (parse/pipeline.py)
+
+    :param source: (bytes) file contents
+    :param f_name: (str) filename for the syntax errors
+    :return: (dict[str, int]) the top level package names and the line of their first import
+    """
+    pkgs = {}
+    try:
+        tree = ast.parse(source, filename=f_name)
+    except (SyntaxError, ValueError):
+        return scan_lines(decode_lines(source), full_scan=True)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            add_imports(pkgs, [alias.name.split('.')[0] for alias in node.names], node.lineno)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level == 0 and node.module:
+                add_imports(pkgs, [node.module.split('.')[0]], node.lineno)
+    return pkgs
+
+
+def decode_lines(source):
+    """
+    :param source: (bytes) file contents
+    :return: (io.StringIO) its lines, decoded like a file opened in text mode
+    """
+    return io.StringIO(source.decode('utf-8', 'replace'), newline=None)
+
+
+def extract_source(source, engine='line', full_scan=False, f_name='<unknown>'):
+    """
+    Finds the packages imported by contents that were already read,
+    the readers of the asyncio pipeline hand the bytes over (parse/pipeline.py)
+
+    :param source: (bytes) file contents
+    :param engine: (str) one of ENGINES
+    :param full_scan: (bool) read the whole file instead of stopping after the imports
+    :param f_name: (str) filename for the syntax errors
+    :return: (dict[str, int]) the top level package names and the line of their first import
+    """
+    get_engine(engine)
+    if engine == 'bytes':
+        return grep_source(source)
+    if engine == 'ast':
+        if source.find(b'import') == -1:
+            return {}
+        return parse_source(source, f_name=f_name)
+    return scan_lines(decode_lines(source), full_scan=full_scan)
+
+
+ENGINES = {
+    'line': scan_imports,
+    'ast': parse_imports,
+    'bytes': grep_imports,
+}
+
+
+def get_engine(engine):
+    """
+    :param engine: (str) one of ENGINES
+    :return: (callable) the extraction function
+    """
+    try:
+        return ENGINES[engine]
+    except KeyError:
+        raise ValueError('Unknown import engine ' + repr(engine) + ', expected one of ' + ', '.join(ENGINES))
+
+
+def extract_file(f_name, engine='line', full_scan=False):
+    """
+    Reads a single file and returns the packages it imports.
+    Runs in the worker processes of a parallel scan.
+
+    :param f_name: (str) filename
+    :param engine: (str) one of ENGINES
+    :param full_scan: (bool) read the whole file instead of stopping after the imports
+    :return: (dict[str, int]) the top level package names and the line of their first import,
+        empty if there are none
+    """
+    return get_engine(engine)(f_name, full_scan=full_scan)
+
+
+def extract_file_pandas(f_name):
+    """
+    The original pandas implementation, kept to benchmark against (bench/extract.py)
+
+    :param f_name: (str) filename
+    :return: (set[str]) the top level package names, empty if there are none
+    """
+    # pandas is slow to import and only needed here for the comparison
+    import pandas as pd
+    with open(f_name, 'r') as file:
+        lines = pd.Series([line for line in file], dtype=object)
+    # checks for any empty files to avoid crashing
+    if not lines.any():
+        return set()
+    lines = lines.str.strip()
+    # import statement starts with import
+    i_import = lines[lines.str.startswith('import')]
+    # import statement starts with from
+    f_import = lines[lines.str.startswith('from')]
+    # all import statments
+    a_imports = pd.concat([i_import, f_import])
+    # checks for any blank imports
+    # no lines that start with import or from
+    if not a_imports.any():
+        return set()
+    pkgs = a_imports.str.split(" ", expand=True)[1]
+    pkgs = pkgs.str.split('.', expand=True)[0]
+    pkgs = pkgs[pkgs != ""]
+    return set(pkgs.dropna())
+
+
+def extract_file_timed(f_name, engine='line', full_scan=False):
+    """
+    extract_file that also measures the file, for the instrumented runs (parse/instrument.py)
+
+    :param f_name: (str) filename
+    :param engine: (str) one of ENGINES
+    :param full_scan: (bool) read the whole file instead of stopping after the imports
+    :return: (tuple[dict[str, int], float, int]) the package names, seconds taken and file size
+    """
+    start = time.perf_counter()
+    pkgs = extract_file(f_name, engine=engine, full_scan=full_scan)
+    return pkgs, time.perf_counter() - start, os.path.getsize(f_name)
@@ -0,0 +1,169 @@
+"""
+A module for looking up requirements while the project files are scanned
+"""
+
+from collections import Counter
+
+
+class DependencyIndex:
+    """
+    The requirement/dependency table from Parse.treefreeze or Parse.resolve in a form
+    that is cheap to update once per file.
+    The rows are keyed by normalised project name, the files import by import name:
+    a requirement is used when any of its import names is imported (pytest => pytest, _pytest, py).
+    Namespace packages are matched by the top level name only,
+    import google marks every requirement installing part of google used.
+    The table is only rebuilt for the export (table).
+
+    Attributes
+    ----------
+    reqs : list[str]
+        the requirement of each row
+    deps : list[str]
+        the dependency of each row
+    rows : dict[str, list[int]]
+        requirement => its row ids
+    import_names : dict[str, list[str]]
+        requirement => its import names
+    imports : dict[str, list[str]]
+        import name => the requirements installing it, several for namespace packages (google)
+    names : frozenset[str]
+        every import name of a requirement
+    used : bytearray
+        1 if the requirement of the row is imported, 0 if not
+    used_names : set[str]
+        the requirements marked used so far
+    counts : Counter
+        requirement => number of files importing any of its import names
+    """
+    def __init__(self, pairs, site_index=None):
+        """
+        :param pairs: (iterable[tuple[str, str]]) (requirement, dependency) normalised project names
+        :param site_index: (SiteIndex) the import names of the installed distributions (parse/metadata.py)
+            None if the requirements are import names already
+        """
+        self.reqs = []
+        self.deps = []
+        self.rows = {}
+        for req, dep in pairs:
+            self.rows.setdefault(req, []).append(len(self.reqs))
+            self.reqs.append(req)
+            self.deps.append(dep)
+        if site_index is not None:
+            self.import_names = dict(zip(self.rows, site_index.get_many(self.rows)))
+        else:
+            self.import_names = {req: [req] for req in self.rows}
+        self.imports = {}
+        for req, import_names in self.import_names.items():
+            for import_name in import_names:
+                if import_name not in self.imports:
+                    # the alias table, every requirement installing the name is used by one import
+                    providers = site_index.providers(import_name) if site_index is not None else [req]
+                    self.imports[import_name] = [name for name in providers if name in self.rows]
+        self.names = frozenset(self.imports)
+        self.used = bytearray(len(self.reqs))
+        self.used_names = set()
+        self.counts = Counter()
+
+    @classmethod
+    def from_frame(cls, req_dep, site_index=None):
+        """
+        :param req_dep: (pd.DataFrame) indexed by req with a dep column (Util.iter_packages)
+        :param site_index: (SiteIndex) the import names of the installed distributions
+        :return: (DependencyIndex)
+        """
+        return cls(zip(req_dep.index, req_dep['dep']), site_index)
+
+    def __contains__(self, name):
+        return name in self.rows
+
+    def __len__(self):
+        return len(self.reqs)
+
+    def requirements_of(self, pkgs):
+        """
+        :param pkgs: (iterable[str]) import names
+        :return: (set[str]) the requirements installing any of them
+        """
+        reqs = set()
+        for name in self.names.intersection(pkgs):
+            reqs.update(self.imports[name])
+        return reqs
+
+    def mark(self, pkgs):
+        """
+        Changes used from 0 to 1 for every row of the imported requirements.
+        A row is only ever written once.
+
+        :param pkgs: (iterable[str]) package names imported by a file
+        :return: (set[str]) the packages that are requirement import names
+        """
+        hits = self.names.intersection(pkgs)
+        if not hits:
+            return hits
+        # a file counts once for a requirement, however many of its import names it uses
+        reqs = self.requirements_of(hits)
+        self.counts.update(reqs)
+        for name in reqs - self.used_names:
+            for row in self.rows[name]:
+                self.used[row] = 1
+            self.used_names.add(name)
+        return hits
+
+    def unmark(self, pkgs):
+        """
+        Undoes mark for a file that changed or was deleted.
+        A requirement goes back to unused once no file imports it.
+
+        :param pkgs: (iterable[str]) package names the file imported
+        :return: (set[str]) the packages that are requirement import names
+        """
+        hits = self.names.intersection(pkgs)
+        if not hits:
+            return hits
+        reqs = self.requirements_of(hits)
+        self.counts.subtract(reqs)
+        for name in reqs:
+            if self.counts[name] <= 0:
+                del self.counts[name]
+                for row in self.rows[name]:
+                    self.used[row] = 0
+                self.used_names.discard(name)
+        return hits
+
+    def restore(self, counts):
+        """
+        Sets the counts of an earlier run instead of marking every file again (parse/diff.py).
+        Only right when the requirements are the same as in that run.
+
+        :param counts: (dict[str, int]) requirement => number of files importing it
+        """
+        self.counts = Counter()
+        self.used = bytearray(len(self.reqs))
+        self.used_names = set()
+        for name, count in counts.items():
+            if name in self.rows and count > 0:
+                self.counts[name] = count
+                for row in self.rows[name]:
+                    self.used[row] = 1
+                self.used_names.add(name)
+
+    def table(self):
+        """
+        :return: (list[tuple[str, str, int]]) (req, dep, used) of every row
+        """
+        return list(zip(self.reqs, self.deps, self.used))
+
+    def dependents_of(self, name):
+        """
+        :param name: (str) normalised project name
+        :return: (list[str]) the requirements it is a dependency of, without itself
+        """
+        return [req for req, dep in zip(self.reqs, self.deps) if dep == name and req != name]
+
+    def deps_of(self, name):
+        """
+        :param name: (str) requirement
+        :return: (list[str]) its dependencies, without itself
+        """
+        return [self.deps[row] for row in self.rows[name] if self.deps[row] != name]
@@ -0,0 +1,199 @@
+"""
+A module for measuring where the time of a run goes
+"""
+
+import cProfile
+import heapq
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class PrintSink:
+    """
+    Prints the summary at the end of a run
+    """
+    def emit(self, summary):
+        """
+        :param summary: (dict) Instrument.summary()
+        """
+        print('stage timings:')
+        for name, seconds in summary['stages'].items():
+            print('  {:<18} {:9.3f}s'.format(name, seconds))
+        line = '  {} files, {:.0f} files/sec'.format(summary['files'], summary['files_per_sec'])
+        if 'bytes_per_sec' in summary:
+            line += ', {:.0f} bytes/sec read'.format(summary['bytes_per_sec'])
+        print(line)
+        if summary['slowest_files']:
+            print('slowest files:')
+            for f_name, seconds in summary['slowest_files']:
+                print('  {:9.4f}s {}'.format(seconds, f_name))
+        if 'peak_memory_bytes' in summary:
+            print('peak traced memory: ' + str(summary['peak_memory_bytes']) + ' bytes')
+        if 'profile' in summary:
+            print('profile written to ' + summary['profile'])
+
+
+class JsonFileSink:
+    """
+    Appends the summary of every run as one json line, to track scan cost over time
+
+    Attributes
+    ----------
+    path : str
+        the json lines file
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, summary):
+        """
+        :param summary: (dict) Instrument.summary()
+        """
+        with open(self.path, 'a') as file:
+            file.write(json.dumps(summary) + '\n')
+
+
+class Instrument:
+    """
+    Stage timers, file counters and the optional cProfile/tracemalloc capture of a run.
+    cProfile and tracemalloc only see the main process, not extraction workers.
+
+    Attributes
+    ----------
+    stages : dict[str, float]
+        stage name => seconds, in the order the stages ran
+    files : int
+        files whose imports were extracted or came from the cache
+    bytes_read : int
+        bytes of the files that were read, only counted when top_n > 0
+    read_seconds : float
+        time spent extracting the files that were read, only counted when top_n > 0
+    top_n : int
+        how many of the slowest files to keep, 0 to not time files
+    slowest : list[tuple[float, str]]
+        heap of the top_n slowest (seconds, filename)
+    profile_path : str
+        where to write the cProfile stats, None to not profile
+    trace_memory : bool
+        capture the peak memory and the top allocation sites with tracemalloc
+    sinks : list
+        objects with an emit(summary) method (PrintSink, JsonFileSink)
+    """
+    def __init__(self, top_n=10, profile_path=None, trace_memory=False, sinks=None):
+        self.stages = {}
+        self.files = 0
+        self.bytes_read = 0
+        self.read_seconds = 0.0
+        self.top_n = top_n
+        self.slowest = []
+        self.profile_path = profile_path
+        self.trace_memory = trace_memory
+        self.sinks = sinks if sinks is not None else [PrintSink()]
+        self._profiler = None
+        self._started = None
+        self._memory = None
+
+    def start(self):
+        """
+        starts the run clock and the profilers
+        """
+        self._started = time.perf_counter()
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profile_path is not None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        """
+        stops the profilers and keeps what they captured
+        """
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_path)
+            self._profiler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            top = tracemalloc.take_snapshot().statistics('lineno')[:10]
+            tracemalloc.stop()
+            self._memory = {
+                'peak_memory_bytes': peak,
+                'top_allocations': [[str(stat.traceback), stat.size] for stat in top],
+            }
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times a block, the time adds up if a stage runs more than once
+
+        :param name: (str) stage name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def file_read(self, f_name, seconds, size):
+        """
+        :param f_name: (str) filename
+        :param seconds: (float) time spent extracting it
+        :param size: (int) its size in bytes
+        """
+        self.bytes_read += size
+        self.read_seconds += seconds
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, (seconds, f_name))
+        elif self.top_n and seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, f_name))
+
+    def summary(self):
+        """
+        :return: (dict) json ready summary of the run
+        """
+        extract_seconds = self.stages.get('extract', 0.0)
+        summary = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'pid': os.getpid(),
+            'total_seconds': time.perf_counter() - self._started if self._started is not None else None,
+            'stages': dict(self.stages),
+            'files': self.files,
+            'files_per_sec': self.files / extract_seconds if extract_seconds else 0.0,
+            'slowest_files': [[f_name, seconds] for seconds, f_name in sorted(self.slowest, reverse=True)],
+        }
+        if self.top_n > 0:
+            # the files are only timed and sized then, a 0 would not be measured
+            summary['bytes_read'] = self.bytes_read
+            summary['bytes_per_sec'] = self.bytes_read / extract_seconds if extract_seconds else 0.0
+        if self._memory is not None:
+            summary.update(self._memory)
+        if self.profile_path is not None:
+            summary['profile'] = self.profile_path
+            summary['profile_top'] = self.profile_top()
+        return summary
+
+    def profile_top(self, limit=15):
+        """
+        :param limit: (int) number of functions
+        :return: (list[list]) [function, calls, cumulative seconds] of the most expensive functions
+        """
+        if not os.path.exists(self.profile_path):
+            return []
+        stats = pstats.Stats(self.profile_path)
+        rows = []
+        for (f_name, line, function), (_, calls, _, cumulative, _) in stats.stats.items():
+            rows.append([f_name + ':' + str(line) + '(' + function + ')', calls, cumulative])
+        rows.sort(key=lambda row: -row[2])
+        return rows[:limit]
+
+    def emit(self):
+        """
+        sends the summary to every sink
+        """
+        summary = self.summary()
+        for sink in self.sinks:
+            sink.emit(summary)
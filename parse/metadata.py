@@ -0,0 +1,227 @@
+"""
+A module for indexing the import names of the installed distributions
+"""
+
+import hashlib
+import os
+import site
+from .cache import cache_home, environment_key, load_json, save_json
+from .names import normalize, requirement_name
+
+# RECORD entries that are not importable modules
+NOT_MODULES = ('.dist-info', '.egg-info', '.data', '.pth', '.exe')
+NOT_MODULE_DIRS = ('__pycache__', 'bin', 'Scripts', 'share', 'include', 'etc')
+MODULE_SUFFIXES = ('.py', '.so', '.pyd')
+
+
+def find_site_dirs():
+    """
+    :return: (list[str]) every existing site-packages directory of this interpreter, user site included
+    """
+    site_dirs = list(site.getsitepackages())
+    if site.ENABLE_USER_SITE:
+        site_dirs.append(site.getusersitepackages())
+    unique = []
+    for site_dir in site_dirs:
+        if site_dir not in unique and os.path.isdir(site_dir):
+            unique.append(site_dir)
+    return unique
+
+
+def top_level_from_files(files):
+    """
+    Infers the top level modules of a distribution without a top_level.txt
+    from the files it installed (RECORD, installed-files.txt)
+
+    pkg/__init__.py => pkg
+    module.py => module
+    _speedups.cpython-39-x86_64-linux-gnu.so => _speedups
+
+    :param files: (list[PackagePath]) the files of a distribution
+    :return: (list[str]) top level module names
+    """
+    names = []
+    for path in files:
+        parts = [part for part in path.parts if part != '..']
+        if not parts:
+            continue
+        top = parts[0]
+        if top.endswith(NOT_MODULES) or top in NOT_MODULE_DIRS:
+            continue
+        if len(parts) == 1:
+            if not top.endswith(MODULE_SUFFIXES):
+                continue
+            top = top.split('.')[0]
+        if top.isidentifier() and top not in names:
+            names.append(top)
+    return names
+
+
+def top_level_names(dist):
+    """
+    :param dist: (importlib.metadata.Distribution) an installed distribution
+    :return: (list[str]) import names, from top_level.txt or else the RECORD
+    """
+    top_level = dist.read_text('top_level.txt')
+    if top_level:
+        names = [name.strip().replace('/', '.').split('.')[0] for name in top_level.splitlines()]
+        names = [name for name in names if name]
+        if names:
+            return names
+    return top_level_from_files(dist.files or [])
+
+
+class SiteIndex:
+    """
+    Import names of every distribution installed in the site-packages directories
+    and the distributions behind every import name, both ways in one alias table.
+    Crawling site-packages is slow so the index is cached on disk
+    and only rebuilt when a site-packages directory changed (parse/cache.py).
+
+    A lookup takes any spelling of a requirement, celery[redis]>=5 or -e git+...#egg=name (parse/names.py),
+    each spelling is parsed once and then found with a single dict probe.
+
+    Attributes
+    ----------
+    site_dirs : list[str]
+        the site-packages directories indexed
+    cache_path : str
+        the json file the index is cached in, None to not cache
+    names : dict[str, list[str]]
+        normalised project name => import names
+        Pillow => PIL
+    requires : dict[str, list[str]]
+        normalised project name => its Requires-Dist entries, resolved in parse/resolve.py
+        requests => ['charset_normalizer<4,>=2', 'idna<4,>=2.5', ..., 'PySocks!=1.5.7,>=1.5.6; extra == "socks"']
+    imports : dict[str, list[str]]
+        import name => normalised names of the distributions installing it
+        many for namespace packages, google => google-api-core, google-auth, google-cloud-storage ...
+    graph : dict[str, list[str]]
+        normalised project name => the normalised names it requires in this environment,
+        filled by DependencyResolver (parse/resolve.py) and cached with the rest
+    closures : dict[str, frozenset[str]]
+        normalised project name => every distribution it needs, directly or not, filled like graph
+    keys : dict[str, str]
+        spelling => normalised project name, '' if it has none, filled as spellings are looked up
+    """
+    version = 4
+
+    def __init__(self, site_dirs=None, cache_path=None):
+        self.site_dirs = site_dirs if site_dirs is not None else find_site_dirs()
+        self.cache_path = cache_path
+        self.names = {}
+        self.requires = {}
+        self.imports = {}
+        self.graph = {}
+        self.closures = {}
+        self.keys = {}
+        self._key = None
+
+    @classmethod
+    def cached(cls, site_dirs=None):
+        """
+        :param site_dirs: (list[str]) site-packages directories, all of this interpreter's by default
+        :return: (SiteIndex) loaded from the cache in cache_home() or freshly built
+            every set of site-packages directories, a venv or an interpreter, has its own cache file
+        """
+        index = cls(site_dirs)
+        digest = hashlib.sha1('\n'.join(index.site_dirs).encode('utf-8')).hexdigest()[:16]
+        index.cache_path = os.path.join(cache_home(), 'site-index-' + digest + '.json')
+        index.load()
+        return index
+
+    def load(self):
+        """
+        Uses the cache when no site-packages directory changed since it was written,
+        otherwise crawls them and rewrites the cache.
+        """
+        self._key = environment_key(self.site_dirs)
+        if self.cache_path is not None:
+            data = load_json(self.cache_path)
+            if data.get('version') == self.version and data.get('key') == self._key:
+                self.names = data['names']
+                self.requires = data['requires']
+                self.imports = data['imports']
+                self.graph = data['graph']
+                self.closures = {name: frozenset(deps) for name, deps in data['closures'].items()}
+                return
+        self.build()
+        self.save()
+
+    def save(self):
+        """
+        Writes the cache, again after DependencyResolver resolved distributions it did not have
+        """
+        if self.cache_path is None:
+            return
+        if self._key is None:
+            self._key = environment_key(self.site_dirs)
+        save_json(self.cache_path, {'version': self.version, 'key': self._key, 'names': self.names,
+                                    'requires': self.requires, 'imports': self.imports, 'graph': self.graph,
+                                    'closures': {name: sorted(deps) for name, deps in self.closures.items()}})
+
+    def build(self):
+        """
+        crawls the site-packages directories, one read of each METADATA gives the name and the dependencies
+        """
+        # importlib.metadata is slow to import and not needed when the cache is used
+        from importlib import metadata
+        self.names = {}
+        self.requires = {}
+        self.imports = {}
+        self.graph = {}
+        self.closures = {}
+        for dist in metadata.distributions(path=self.site_dirs):
+            dist_metadata = dist.metadata
+            name = dist_metadata['Name']
+            if not name:
+                continue
+            name = normalize(name)
+            # the first directory on the path wins, like the import system
+            if name not in self.names:
+                self.names[name] = top_level_names(dist)
+                self.requires[name] = dist_metadata.get_all('Requires-Dist') or []
+        for name in sorted(self.names):
+            for import_name in self.names[name]:
+                self.imports.setdefault(import_name, []).append(name)
+
+    def key(self, requirement):
+        """
+        :param requirement: (str) project name or requirement line as written in requirements.txt or treefreeze.txt
+        :return: (str) the normalised project name, '' if the line has none
+        """
+        if requirement in self.names:
+            return requirement
+        key = self.keys.get(requirement)
+        if key is None:
+            key = requirement_name(requirement) or ''
+            self.keys[requirement] = key
+        return key
+
+    def get(self, requirement):
+        """
+        :param requirement: (str) project name or requirement line as written in requirements.txt or treefreeze.txt
+        :return: (list[str]) its import names, empty if it is not installed
+        """
+        return self.names.get(self.key(requirement), [])
+
+    def get_many(self, requirements):
+        """
+        Looks up a whole column of requirements, every distinct spelling is parsed once
+
+        :param requirements: (iterable[str]) project names or requirement lines
+        :return: (list[list[str]]) the import names of each, empty if it is not installed
+        """
+        names = self.names
+        key = self.key
+        return [names.get(key(requirement), []) for requirement in requirements]
+
+    def providers(self, import_name):
+        """
+        :param import_name: (str) top level import name
+        :return: (list[str]) normalised names of the distributions installing it, several for namespace packages
+        """
+        return self.imports.get(import_name, [])
+
+    def __contains__(self, requirement):
+        return self.key(requirement) in self.names
@@ -0,0 +1,70 @@
+"""
+A module for reading project names from requirement lines
+
+Every spelling of a requirement comes down to one normalised project name:
+    Django>=3.2                                  => django
+    celery[redis,sqs]==5.2 ; python_version>"3"  => celery
+    python_dateutil (>=2.8.1)                    => python-dateutil
+    pandas @ file:///C:/ci/pandas_1635506685681/work  => pandas
+    -e git+https://github.com/org/repo.git#egg=my_app  => my-app
+Lines without a project name (pip options, bare urls and paths) give None.
+"""
+
+import re
+
+# PEP 508 project name at the start of a requirement
+NAME = re.compile(r'\s*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)')
+# name[extras] @ url
+NAME_AT = re.compile(NAME.pattern + r'\s*(?:\[[^\]]*\])?\s*@')
+# the project name of a vcs or url requirement, #egg=name or &egg=name
+EGG = re.compile(r'[#&]egg=([A-Za-z0-9][A-Za-z0-9._-]*)')
+# a legacy egg fragment with the version, my_app-1.0
+EGG_VERSION = re.compile(r'-\d[^-]*$')
+# git+https://, file:, a url without a name in front of it
+URL = re.compile(r'\s*[A-Za-z][A-Za-z0-9+.-]*:')
+# wheels and sdists are named name-version..., the name never has a -
+ARCHIVES = ('.whl', '.tar.gz', '.tar.bz2', '.zip')
+
+
+def normalize(name):
+    """
+    PEP 503 normalised project name, the same project can be written
+    Django, django, python-dateutil, python_dateutil, zope.event, zope-event ...
+
+    :param name: (str) project name
+    :return: (str) lower case name with runs of - _ . replaced by -
+    """
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def requirement_name(requirement):
+    """
+    Follows the PEP 508 grammar for the name, whatever comes after it
+    (extras, versions, markers, @ url, --hash options) is left out.
+
+    :param requirement: (str) a requirements.txt or treefreeze.txt line or a Requires-Dist entry
+        'python-dateutil (>=2.8.1)', 'urllib3[socks]<3,>=1.21.1; python_version >= "3.7"'
+    :return: (str) the normalised project name, None if there is none
+    """
+    line = requirement.strip()
+    if not line or line.startswith('#'):
+        return None
+    # pip only takes # as a comment after whitespace, url fragments stay
+    line = re.split(r'\s#', line, 1)[0]
+    egg = EGG.search(line)
+    if egg is not None:
+        # -e git+https://...#egg=name, the name is all there is
+        return normalize(EGG_VERSION.sub('', egg.group(1)))
+    match = NAME_AT.match(line)
+    if match is not None:
+        return normalize(match.group(1))
+    if line.endswith(ARCHIVES):
+        # ./dist/Django-3.2-py3-none-any.whl, https://host/pkg_name-1.0.tar.gz
+        line = line.replace('\\', '/').rsplit('/', 1)[-1].split('-', 1)[0]
+    elif line.startswith('-') or URL.match(line):
+        # -r other.txt, --index-url, -e ./local/path, git+https://... without an egg
+        return None
+    match = NAME.match(line)
+    if match is None:
+        return None
+    return normalize(match.group(1))
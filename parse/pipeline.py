@@ -0,0 +1,218 @@
+"""
+A module for reading the project files with asyncio, for network mounted and other slow file systems
+
+The walk runs on a thread and feeds a bounded queue of paths,
+reader tasks fetch the contents on a thread pool and feed a bounded queue of contents,
+one parser task extracts the imports. A full queue holds up the stage before it,
+so at most queue_size paths and queue_size + readers files are in memory
+however big the project is, while readers files wait on the file system at the same time.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .extract import MMAP_THRESHOLD, extract_file, extract_source
+
+# ends a queue, one per task reading it
+DONE = None
+
+
+def read_source(f_name):
+    """
+    :param f_name: (str) filename
+    :return: (bytes) the file contents, None for files of MMAP_THRESHOLD and up,
+        those are extracted from the path so they are never held whole (parse/extract.py)
+    """
+    with open(f_name, 'rb') as file:
+        if os.fstat(file.fileno()).st_size >= MMAP_THRESHOLD:
+            return None
+        return file.read()
+
+
+class ReadPipeline:
+    """
+    Extracts the imports of the project files with many reads waiting on the file system at once.
+    The results keep the walk order, so the merge gives the same reports as the serial scan.
+
+    Attributes
+    ----------
+    engine : str
+        how imports are extracted, one of ENGINES (parse/extract.py)
+    full_scan : bool
+        read whole files instead of stopping after the imports at the top
+    readers : int
+        reader tasks, each waits on one file at a time on its own thread
+    queue_size : int
+        paths waiting to be read and contents waiting to be parsed, each queue holds at most this many
+    cache : ImportCache
+        unchanged files are not read (parse/cache.py), None to read every file
+    read : callable
+        f_name => contents, None to extract from the path, read_source unless passed in
+        (bench/pipeline.py passes a slow one)
+    instrument : Instrument
+        the time and size of each file read are reported to it (parse/instrument.py), None to not time files
+    """
+    def __init__(self, engine='line', full_scan=False, readers=16, queue_size=64, cache=None, read=read_source,
+                 instrument=None):
+        if readers < 1 or queue_size < 1:
+            raise ValueError('readers and queue_size must be at least 1')
+        self.engine = engine
+        self.full_scan = full_scan
+        self.readers = readers
+        self.queue_size = queue_size
+        self.cache = cache
+        self.read = read
+        self.instrument = instrument
+
+    def run(self, f_names):
+        """
+        :param f_names: (iterable[str]) paths of the py files, a walk generator is consumed on a thread
+        :return: (tuple[list[str], list[dict[str, int]]]) the paths in walk order
+            and the package names and lines of each
+        """
+        return asyncio.run(self.pipeline(f_names))
+
+    async def pipeline(self, f_names):
+        """
+        :param f_names: (iterable[str]) paths of the py files
+        :return: (tuple[list[str], list[dict[str, int]]]) see run
+        """
+        loop = asyncio.get_running_loop()
+        paths = asyncio.Queue()
+        contents = asyncio.Queue(self.queue_size)
+        # the paths queue is filled from the walk thread, this bounds it
+        room = threading.Semaphore(self.queue_size)
+        stop = threading.Event()
+        walked = []
+        found = {}
+        errors = {}
+        tasks = []
+        with ThreadPoolExecutor(max_workers=self.readers + 1) as pool:
+            try:
+                walker = loop.run_in_executor(pool, self.walk, f_names, walked, paths, room, stop, loop)
+                tasks = [asyncio.ensure_future(self.reader(paths, contents, room, pool, errors))
+                         for _ in range(self.readers)]
+                parser = asyncio.ensure_future(self.parser(contents, found, errors))
+                await walker
+                for _ in range(self.readers):
+                    paths.put_nowait(DONE)
+                await asyncio.gather(*tasks)
+                await contents.put(DONE)
+                await parser
+            finally:
+                for task in tasks:
+                    task.cancel()
+                # interrupted, a walk waiting for room must not hold up the pool shutdown
+                stop.set()
+                room.release()
+        if errors:
+            # the error of the first file in walk order, like the serial scan
+            raise errors[min(errors)]
+        return walked, [found[i] for i in range(len(walked))]
+
+    @staticmethod
+    def walk(f_names, walked, paths, room, stop, loop):
+        """
+        Runs on a thread, waits while the paths queue is full
+
+        :param f_names: (iterable[str]) paths of the py files
+        :param walked: (list[str]) every path is appended to it in walk order
+        :param paths: (asyncio.Queue) (index, path) to read
+        :param room: (threading.Semaphore) free places in the paths queue
+        :param stop: (threading.Event) set when the pipeline gave up
+        :param loop: (asyncio.AbstractEventLoop) the loop of the queue
+        """
+        for f_name in f_names:
+            room.acquire()
+            if stop.is_set():
+                return
+            loop.call_soon_threadsafe(paths.put_nowait, (len(walked), f_name))
+            walked.append(f_name)
+
+    def fetch(self, f_name):
+        """
+        Runs on a reader thread, only file system work and the extraction of big files
+
+        :param f_name: (str) filename
+        :return: (tuple) (cached package names or None, stat for ImportCache.record,
+            contents or None, package names of a big file or None, seconds, size)
+        """
+        start = time.perf_counter()
+        cached, stat = self.cache.lookup(f_name) if self.cache is not None else (None, None)
+        source = pkgs = None
+        size = 0
+        if cached is None:
+            source = self.read(f_name)
+            if source is None:
+                pkgs = extract_file(f_name, engine=self.engine, full_scan=self.full_scan)
+                size = os.path.getsize(f_name)
+            else:
+                size = len(source)
+                if self.cache is not None and self.cache.hash_contents and stat[2] is None:
+                    # hashed here, ImportCache.put would read the file again
+                    stat = stat[:2] + (hashlib.sha1(source).hexdigest(),)
+        return cached, stat, source, pkgs, time.perf_counter() - start, size
+
+    async def reader(self, paths, contents, room, pool, errors):
+        """
+        :param paths: (asyncio.Queue) (index, path) to read, DONE to stop
+        :param contents: (asyncio.Queue) (index, path, what fetch returned) to parse
+        :param room: (threading.Semaphore) released for every path taken
+        :param pool: (ThreadPoolExecutor) the reads wait here
+        :param errors: (dict[int, Exception]) walk index => what went wrong reading the file
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await paths.get()
+            if item is DONE:
+                return
+            room.release()
+            i, f_name = item
+            try:
+                fetched = await loop.run_in_executor(pool, self.fetch, f_name)
+            except Exception as error:
+                # kept going so the other stages never wait on a dead task
+                errors[i] = error
+                fetched = None
+            await contents.put((i, f_name, fetched))
+
+    async def parser(self, contents, found, errors):
+        """
+        Extracts on the loop, the only task that touches the cache and the instrument
+
+        :param contents: (asyncio.Queue) (index, path, what fetch returned), DONE to stop
+        :param found: (dict[int, dict[str, int]]) walk index => the package names and lines of the file
+        :param errors: (dict[int, Exception]) walk index => what went wrong
+        """
+        timed = self.instrument is not None and self.instrument.top_n > 0
+        while True:
+            item = await contents.get()
+            if item is DONE:
+                return
+            i, f_name, fetched = item
+            if fetched is None:
+                found[i] = {}
+                continue
+            cached, stat, source, pkgs, seconds, size = fetched
+            if self.cache is not None:
+                self.cache.record(f_name, cached, stat)
+            if cached is not None:
+                found[i] = cached
+                continue
+            try:
+                if pkgs is None:
+                    start = time.perf_counter()
+                    pkgs = extract_source(source, engine=self.engine, full_scan=self.full_scan, f_name=f_name)
+                    seconds += time.perf_counter() - start
+            except Exception as error:
+                errors[i] = error
+                found[i] = {}
+                continue
+            found[i] = pkgs
+            if self.cache is not None:
+                self.cache.put(f_name, pkgs)
+            if timed:
+                self.instrument.file_read(f_name, seconds, size)
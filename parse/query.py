@@ -0,0 +1,69 @@
+"""
+A module for answering if one requirement is used without a full run.
+Only the cheap modules are imported here, not pandas.
+"""
+
+import os
+from .cache import ImportCache
+from .extract import extract_file
+from .metadata import SiteIndex
+from .walk import DEFAULT_EXCLUDES, MAX_DEPTH, walk_py_files
+
+
+def requirement_import_names(requirement, use_cache=True):
+    """
+    :param requirement: (str) project name as written in requirements.txt, celery[redis] or python-dateutil>=2.8
+    :param use_cache: (bool) use the cached site-packages index (parse/metadata.py)
+    :return: (list[str]) its import names,
+        the normalised name with - as _ when it is not installed (python-dateutil => python_dateutil)
+    """
+    index = SiteIndex.cached() if use_cache else SiteIndex()
+    if not use_cache:
+        index.build()
+    names = index.get(requirement)
+    if not names:
+        names = [(index.key(requirement) or requirement).replace('-', '_')]
+    return names
+
+
+def find_importing_files(parent_dj_proj, import_names, chks_parent_dj_dir=None, use_cache=True, engine='line',
+                         full_scan=False, excludes=DEFAULT_EXCLUDES, use_gitignore=True, max_depth=MAX_DEPTH):
+    """
+    Streams the project files, unchanged files come from the import cache of the last scan.
+    Files that were read are added to the cache.
+
+    :param parent_dj_proj: (str) the django project directory
+    :param import_names: (list[str]) the import names to look for
+    :param chks_parent_dj_dir: (str) the output directory, it is not scanned and holds the import cache
+    :param use_cache: (bool) use the import cache, only with chks_parent_dj_dir
+    :param engine: (str) import engine (parse/extract.py)
+    :param full_scan: (bool) read whole files instead of stopping after the imports at the top
+    :param excludes: (tuple[str]) glob patterns of directories and files that are not scanned
+    :param use_gitignore: (bool) skip the git ignored directories and files
+    :param max_depth: (int) how deep to walk
+    :return: (list[str]) the files importing any of the names, relative to the project
+    """
+    import_names = set(import_names)
+    cache = None
+    skip_dirs = []
+    if chks_parent_dj_dir is not None:
+        # the reports and this code are not part of the project, cached or not
+        skip_dirs.append(chks_parent_dj_dir)
+        if use_cache:
+            cache = ImportCache.in_directory(chks_parent_dj_dir, parent_dj_proj, engine=engine, full_scan=full_scan)
+            cache.load()
+    files = []
+    for f_name in walk_py_files(parent_dj_proj, excludes=excludes, use_gitignore=use_gitignore,
+                                max_depth=max_depth, skip_dirs=skip_dirs):
+        pkgs = cache.get(f_name) if cache is not None else None
+        if pkgs is None:
+            pkgs = extract_file(f_name, engine=engine, full_scan=full_scan)
+            if cache is not None:
+                cache.put(f_name, pkgs)
+        if import_names.intersection(pkgs):
+            files.append(os.path.relpath(f_name, parent_dj_proj))
+    if cache is not None and cache.misses:
+        # query can run before any scan created the output directory
+        os.makedirs(chks_parent_dj_dir, exist_ok=True)
+        cache.save()
+    return files
@@ -0,0 +1,163 @@
+"""
+A module for resolving the dependencies of the requirements
+from the Requires-Dist metadata of the installed distributions,
+so pipdeptree and treefreeze.txt are not needed
+"""
+
+import os
+import platform
+import re
+import sys
+from .names import normalize, requirement_name
+
+# python_version < "3.8", the markers understood without packaging
+SIMPLE_MARKER = re.compile(r'''^\s*(python_version|python_full_version|sys_platform|platform_system|os_name|'''
+                           r'''implementation_name)\s*(==|!=|<=|>=|<|>)\s*['"]([^'"]*)['"]\s*$''')
+
+
+def marker_environment():
+    """
+    :return: (dict[str, str]) the values of the simple markers for this interpreter
+    """
+    return {
+        'python_version': '.'.join(platform.python_version_tuple()[:2]),
+        'python_full_version': platform.python_version(),
+        'sys_platform': sys.platform,
+        'platform_system': platform.system(),
+        'os_name': os.name,
+        'implementation_name': sys.implementation.name,
+    }
+
+
+def version_tuple(version):
+    """
+    :param version: (str) 3.10.2
+    :return: (tuple[int]) (3, 10, 2), non numeric parts are left out
+    """
+    return tuple(int(part) for part in re.findall(r'\d+', version))
+
+
+def simple_marker_applies(marker, environment):
+    """
+    Evaluates the markers joined by 'and' without packaging.
+    A marker it does not understand applies, a dependency too many is safer than one missing.
+
+    :param marker: (str) python_version < "3.8" and sys_platform == "win32"
+    :param environment: (dict[str, str]) marker_environment()
+    :return: (bool) True if the dependency is installed in this environment
+    """
+    if ' or ' in marker or '(' in marker:
+        return True
+    for part in marker.split(' and '):
+        match = SIMPLE_MARKER.match(part)
+        if match is None:
+            continue
+        variable, op, value = match.groups()
+        current = environment[variable]
+        if variable in ('python_version', 'python_full_version'):
+            current, value = version_tuple(current), version_tuple(value)
+        applies = {
+            '==': current == value, '!=': current != value,
+            '<': current < value, '<=': current <= value,
+            '>': current > value, '>=': current >= value,
+        }[op]
+        if not applies:
+            return False
+    return True
+
+
+class DependencyResolver:
+    """
+    The dependency graph of the installed distributions
+    with the transitive dependencies of each distribution memoised.
+
+    Attributes
+    ----------
+    site_index : SiteIndex
+        the import names and Requires-Dist entries of the installed distributions (parse/metadata.py)
+        cached on disk and rebuilt when site-packages changes
+    graph : dict[str, list[str]]
+        normalised project name => the normalised names it requires in this environment
+        shared with the site index, so the markers are evaluated once per environment, not once per run
+    closures : dict[str, frozenset[str]]
+        normalised project name => every distribution it needs, directly or not, shared like graph
+    resolved : int
+        closures resolved since the site index cache was saved, it is saved again if there are any
+    marker : type
+        packaging.markers.Marker, None if packaging is not installed
+    """
+    def __init__(self, site_index):
+        self.site_index = site_index
+        self.graph = site_index.graph
+        self.closures = site_index.closures
+        self.resolved = 0
+        self._environment = marker_environment()
+        # packaging is optional, it evaluates every environment marker
+        try:
+            from packaging.markers import Marker
+            self.marker = Marker
+        except ImportError:
+            self.marker = None
+
+    def marker_applies(self, marker):
+        """
+        Dependencies of extras are left out, they are only installed when the extra is asked for
+
+        :param marker: (str) the environment marker after the ;
+        :return: (bool) True if the dependency is installed in this environment
+        """
+        if self.marker is not None:
+            try:
+                return self.marker(marker).evaluate({'extra': ''})
+            except (ValueError, KeyError):
+                # InvalidMarker, UndefinedComparison, UndefinedEnvironmentName
+                return True
+        if 'extra' in marker:
+            return False
+        return simple_marker_applies(marker, self._environment)
+
+    def requires(self, name):
+        """
+        :param name: (str) normalised project name
+        :return: (list[str]) the normalised names it requires in this environment
+        """
+        requires = self.graph.get(name)
+        if requires is None:
+            requires = []
+            for requirement in self.site_index.requires.get(name, []):
+                requirement, _, marker = requirement.partition(';')
+                if marker.strip() and not self.marker_applies(marker.strip()):
+                    continue
+                dep = requirement_name(requirement)
+                if dep is not None and dep not in requires:
+                    requires.append(dep)
+            self.graph[name] = requires
+        return requires
+
+    def closure(self, name):
+        """
+        :param name: (str) project name
+        :return: (frozenset[str]) the normalised names of every distribution it needs, without itself
+        """
+        name = normalize(name)
+        closure = self.closures.get(name)
+        if closure is not None:
+            return closure
+        seen = set()
+        stack = list(self.requires(name))
+        while stack:
+            dep = stack.pop()
+            if dep in seen:
+                continue
+            seen.add(dep)
+            known = self.closures.get(dep)
+            if known is not None:
+                # resolved before, no need to walk below it again
+                seen.update(known)
+            else:
+                stack.extend(self.requires(dep))
+        seen.discard(name)
+        closure = frozenset(seen)
+        self.closures[name] = closure
+        self.resolved += 1
+        return closure
@@ -2,28 +2,8 @@
 A module for the utility functions needed for parsing files
 """
 
-import site
-import os
-import pandas as pd
-
-
-def find_my_site_packages():
-    """
-    Static function to find your site package directory.
-    !# may need to change me depending on the environment
-    :return: (str) directory location of this python environment's site packages
-    """
-    print('You may need to change me depending on your environment')
-    pkgs_dir = site.getsitepackages()[0]
-    # [
-    #   ' /root/.cache/activestate/868be8dc/lib/python2.7/site-packages/',
-    #   '/root/.cache/activestate/868be8dc/lib/site-python'
-    # ]
-    # pkgs_dir = '/root/.cache/activestate/868be8dc/lib/python2.7/site-packages'
-    # pkgs_dir = '/opt/ActivePython-2.7/lib/python2.7/site-packages'
-    print('I should be something similar to /root/.cache/activestate/868be8dc/lib/python2.7/site-packages')
-    print(pkgs_dir)
-    return pkgs_dir
+from .metadata import SiteIndex, find_site_dirs
+from .resolve import DependencyResolver
 
 
 class Util:
@@ -32,16 +12,32 @@ class Util:
 
     Attributes
     ----------
+    site_dirs : list[str]
+        the site-packages directories to check, all of this interpreter's by default
     site_pkgs_dir : str
-        a directory path to check the site-packages
+        the site-packages directories for messages
+    use_cache : bool
+        keep the site-packages index between runs (parse/metadata.py)
+    site_index : SiteIndex
+        the import names and dependencies of the installed distributions, None until it is needed
+    resolver : DependencyResolver
+        the memoised dependency graph (parse/resolve.py), None until it is needed
     """
-    def __init__(self):
-        self.site_pkgs_dir = find_my_site_packages()
+    def __init__(self, site_dirs=None, use_cache=True):
+        self.use_cache = use_cache
+        self.site_index = None
+        self.resolver = None
+        if site_dirs is None:
+            site_dirs = find_site_dirs()
+        self.site_dirs = site_dirs
+        self.site_pkgs_dir = ', '.join(site_dirs)
+        print('checking the site-packages in ' + self.site_pkgs_dir)
 
     @staticmethod
     def find_requirements_name(requirement_line, search_list):
         """
         finds the package name without version number
+        Parse reads the lines with requirement_name (parse/names.py), this is kept for scripts using it
         :params requirement_line: (str) single line read from requirements.txt or treefreeze.txt
         :params search_list: (List[str]) a list of strings to search for within in the line.
 
@@ -72,7 +68,9 @@ class Util:
             # this finds requirements with versions
             # matplotlib~=3.4.3 finds "~=" at position 10
             # returns matplotlib
-            loc = symb[0]
+            # the earliest symbol, the first one of the list cuts
+            # celery>=5; python_version=="3.8" at == into celery>=5; python_version
+            loc = min(symb)
             return requirement_line[:loc]
         else:
             # this finds requirements with no versions
@@ -96,63 +94,77 @@ class Util:
         everything indented under it is the dependencies of the above req
 
         :return: a pd dataframe with the requirement and it's dependencies
+            as normalised project names, a requirement is also listed as its own dependency
         """
         import_names = self.get_import_names()
         req_dep = []
-        req = ''
-        for index, req_or_dep in pkg_names.iteritems():
+        req = req_key = ''
+        for req_or_dep in pkg_names:
             req_or_dep = req_or_dep.rstrip()
             if req_or_dep.startswith('  '):
                 # then it's a dependency
                 dep = req_or_dep
                 # remove indents
                 dep = dep.lstrip()
-                try:
-                    dep = import_names.loc[dep]['top_lvl_name']
-                    l_req_dep = (req, dep)
-                    req_dep.append(l_req_dep)
-                except KeyError:
+                if dep in import_names:
+                    if req_key:
+                        req_dep.append((req_key, import_names.key(dep)))
+                else:
                     print('Error Dependency ' + dep + ' of ' + req + ' not  found in ' + self.site_pkgs_dir)
             else:
                 # then it's a requirement
                 req = req_or_dep
-                try:
-                    req = import_names.loc[req]['top_lvl_name']
-                    l_req_dep = (req, req)
-                    req_dep.append(l_req_dep)
-                except KeyError:
+                # python_dateutil => python-dateutil, one row whatever it installs
+                req_key = import_names.key(req) if req in import_names else ''
+                if req_key:
+                    req_dep.append((req_key, req_key))
+                else:
                     print('Error Requirement ' + req + ' not found in ' + self.site_pkgs_dir)
 
-
+        # pandas is slow to import, only load it when the requirements are parsed
+        import pandas as pd
         # sets index for faster look up
         req_dep = pd.DataFrame(req_dep, columns=['req', 'dep'])
         req_dep.set_index('req', inplace=True)
         req_dep['used'] = 0
         return req_dep
 
-    def get_top_level_txt(self, pkg_dir_name):
+    def resolve_packages(self, req_names):
         """
-        :param pkg_dir_name: (str)
-        :return: (str)
-            either the import name from the top_lvl.txt or the directory name
+        The requirements and every distribution they need, directly or not,
+        from the Requires-Dist metadata of site-packages (parse/resolve.py)
+
+        :param req_names: (list[str]) project names from requirements.txt
+        :return: (list[tuple[str, str]]) (requirement, dependency) normalised project names
+            a requirement is also listed as its own dependency, like iter_packages
         """
-        fname = "top_level.txt"
-        path = os.path.join(self.site_pkgs_dir, pkg_dir_name)
-        if os.path.isdir(path):
-            for pkg_contents in os.listdir(path):
-                if pkg_contents == fname:
-                    top_level_file_path = os.path.join(path, fname)
-                    # PIL, cryptography, etc
-                    with open(top_level_file_path, "r") as top_level_file:
-                        lines = [line for line in top_level_file]
-                    top_lvl_name = lines[0].strip()
-                    if not top_lvl_name:
-                        print("******** missing top_lvl_name: " + pkg_dir_name)
-                        test = pkg_dir_name[:pkg_dir_name.find("-")]
-                        print("******** returning: " + test)
-                        return test
-                    else:
-                        return top_lvl_name
+        import_names = self.get_import_names()
+        resolver = self.get_resolver()
+        req_dep = []
+        for req in req_names:
+            req_key = import_names.key(req)
+            if req_key not in import_names.names:
+                print('Error Requirement ' + req + ' not found in ' + self.site_pkgs_dir)
+                continue
+            req_dep.append((req_key, req_key))
+            for dep in sorted(resolver.closure(req_key)):
+                if dep in import_names.names:
+                    req_dep.append((req_key, dep))
+                else:
+                    print('Error Dependency ' + dep + ' of ' + req + ' not found in ' + self.site_pkgs_dir)
+        if resolver.resolved:
+            # the next run finds the graph in the cache
+            import_names.save()
+            resolver.resolved = 0
+        return req_dep
+
+    def get_resolver(self):
+        """
+        :return: (DependencyResolver) over the same site-packages index as get_import_names
+        """
+        if self.resolver is None:
+            self.resolver = DependencyResolver(self.get_import_names())
+        return self.resolver
 
     def get_import_names(self):
         """
@@ -160,48 +172,14 @@ class Util:
         Example:
         requirement name: Pillow (pip install Pillow)
         import name: PIL (import PIL)
-        :return: pandas dataframe with the requirement name and the import name
+        The names come from each distribution's top_level.txt,
+        or its RECORD when it has no top_level.txt.
+        :return: (SiteIndex) the requirement names and their import names (parse/metadata.py)
         """
-        endings = [
-            ".dist-info",
-            ".dist-info'",
-            "-py2.7.egg-info",
-            # "-py2.7-nspkg.pth",
-            #".py",
-            #".post1-py2.7.egg-info",
-            #"-py3.6.egg-info",
-            #"-py3.7-nspkg.pth",
-            #"-py3.9-win-amd64.egg-info",
-            #".cp39-win_amd64.pyd",
-            #"-py3.9.egg-info",
-            #"-py3.9.egg",
-            #"-py3.9-nspkg.pth",
-            #"-py3.10.egg-info"
-        ]
-        pkg_dir_names = pd.Series(os.listdir(self.site_pkgs_dir), name="dir_name")
-        info = pd.Series()
-        for end in endings:
-            dir_names_end_in = pkg_dir_names[pkg_dir_names.str.endswith(end)]
-            info = info.append(dir_names_end_in)
-
-        top_lvl_names = info.apply(lambda dir_name: self.get_top_level_txt(dir_name))
-        top_lvl_names.rename("top_lvl_name", inplace=True)
-        top_lvl_names = pd.concat([pkg_dir_names, top_lvl_names], axis=1)
-
-        reqs = top_lvl_names['dir_name'].apply(lambda name: self.find_requirements_name(name, endings))
-        # string parsing
-        # changes XlsxWriter-3.0.1 into XlsxWriter==3.0.1
-        reqs = reqs.str.replace('-', "==")
-        reqs = reqs.str.replace('_', "-")
-        reqs.rename('requirement', inplace=True)
-        import_names = pd.concat([top_lvl_names['dir_name'], top_lvl_names['top_lvl_name'], reqs], axis=1)
-        requirements = import_names[import_names['requirement'].str.contains('==')]
-        r = requirements['requirement'].str.split('==', expand=True)
-        requirements[['requirement_name', 'req_version']] = r[[0, 1]]
-        requirements = requirements[['requirement_name', 'top_lvl_name']]
-        # req_name | top_lvl_name
-        # --------------------------
-        # Pillow     |  PIL
-        # cryptography| cryptography
-        requirements.set_index('requirement_name', inplace=True, drop=True)
-        return requirements
+        if self.site_index is None:
+            if self.use_cache:
+                self.site_index = SiteIndex.cached(self.site_dirs)
+            else:
+                self.site_index = SiteIndex(self.site_dirs)
+                self.site_index.build()
+        return self.site_index
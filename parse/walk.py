@@ -0,0 +1,236 @@
+"""
+A module for finding the py files of a django project
+"""
+
+import fnmatch
+import os
+import re
+
+# directories that never hold project code
+DEFAULT_EXCLUDES = ('.git', '.hg', '.svn', 'node_modules', '__pycache__', 'static', 'venv', '.venv',
+                    '.tox', '.nox', '.mypy_cache', '.pytest_cache', '.ruff_cache', 'site-packages')
+# deeper directories are not entered, symlink loops or vendored trees
+MAX_DEPTH = 32
+
+
+def translate(pattern):
+    """
+    Turns a .gitignore glob into a regular expression
+
+    :param pattern: (str) glob without the leading ! or /
+    :return: (str) regular expression
+    """
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            # a/**/b => a/b, a/x/b, a/x/y/b
+            regex += '(?:.*/)?'
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+            continue
+        if char == '*':
+            regex += '[^/]*'
+        elif char == '?':
+            regex += '[^/]'
+        elif char == '[' and ']' in pattern[i + 1:]:
+            end = pattern.index(']', i + 1)
+            group = pattern[i + 1:end]
+            if group.startswith('!'):
+                group = '^' + group[1:]
+            regex += '[' + group.replace('\\', '\\\\') + ']'
+            i = end
+        else:
+            regex += re.escape(char)
+        i += 1
+    return regex
+
+
+class IgnoreRules:
+    """
+    The patterns of one .gitignore file
+
+    Attributes
+    ----------
+    base : str
+        the directory of the .gitignore relative to the project, '' for the project root
+    patterns : list[tuple[re.Pattern, bool, bool]]
+        (regex, negated, directories only) in file order, the last match wins
+    """
+    def __init__(self, base, lines):
+        """
+        :param base: (str) the directory of the .gitignore relative to the project
+        :param lines: (iterable[str]) the lines of the .gitignore
+        """
+        self.base = base
+        self.patterns = []
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            elif line.startswith('\\'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            # a slash anywhere but the end anchors the pattern to the .gitignore directory
+            anchored = '/' in line
+            regex = translate(line.lstrip('/'))
+            if not anchored:
+                regex = '(?:.*/)?' + regex
+            self.patterns.append((re.compile(regex), negated, dir_only))
+
+    @classmethod
+    def read(cls, base, path):
+        """
+        :param base: (str) the directory of the .gitignore relative to the project
+        :param path: (str) the .gitignore file
+        :return: (IgnoreRules)
+        """
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            return cls(base, file)
+
+    def match(self, rel_path, is_dir):
+        """
+        :param rel_path: (str) path relative to the project, / separated
+        :param is_dir: (bool) the path is a directory
+        :return: (bool) True if ignored, False if re-included with !, None if no pattern matched
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+        ignored = None
+        for regex, negated, dir_only in self.patterns:
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(rel_path):
+                ignored = not negated
+        return ignored
+
+
+def is_ignored(rules, rel_path, is_dir):
+    """
+    :param rules: (list[IgnoreRules]) the .gitignore files from the project root down
+    :param rel_path: (str) path relative to the project, / separated
+    :param is_dir: (bool) the path is a directory
+    :return: (bool) the deepest .gitignore with a matching pattern decides
+    """
+    ignored = False
+    for rule in rules:
+        decision = rule.match(rel_path, is_dir)
+        if decision is not None:
+            ignored = decision
+    return ignored
+
+
+def exclude_regex(excludes):
+    """
+    One regex for all the patterns instead of an fnmatch call per pattern
+
+    :param excludes: (iterable[str]) glob patterns
+    :return: (re.Pattern) matches a name or relative path of any pattern, None if there are none
+    """
+    excludes = list(excludes)
+    return re.compile('|'.join(fnmatch.translate(pattern) for pattern in excludes)) if excludes else None
+
+
+def is_walked(root, rel_path, excludes=DEFAULT_EXCLUDES, use_gitignore=True, max_depth=MAX_DEPTH, skip_dirs=()):
+    """
+    Tells if walk_py_files would yield a file without walking the project,
+    only the directories on its path are looked at (parse/diff.py)
+
+    :param root: (str) the django project directory
+    :param rel_path: (str) path relative to the project, / separated
+    :param excludes: (iterable[str]) glob patterns matched against names and project relative paths
+    :param use_gitignore: (bool) honour the .gitignore files of the project
+    :param max_depth: (int) directories nested deeper than this are not entered
+    :param skip_dirs: (iterable[str]) directories to leave out (chks_parent_dj_dir)
+    :return: (bool) True if the file exists and is scanned
+    """
+    parts = rel_path.split('/')
+    if not rel_path.endswith('.py') or len(parts) - 1 > max_depth:
+        return False
+    skip_dirs = set(os.path.abspath(skip_dir) for skip_dir in skip_dirs)
+    excluded = exclude_regex(excludes)
+    rules = []
+    directory = root
+    rel_dir = ''
+    for depth, name in enumerate(parts):
+        if depth > 0 and (os.path.islink(directory) or os.path.exists(os.path.join(directory, 'pyvenv.cfg'))):
+            return False
+        gitignore = os.path.join(directory, '.gitignore')
+        if use_gitignore and os.path.isfile(gitignore):
+            rules = rules + [IgnoreRules.read(rel_dir, gitignore)]
+        is_dir = depth < len(parts) - 1
+        rel_dir = rel_dir + '/' + name if rel_dir else name
+        directory = os.path.join(directory, name)
+        if excluded is not None and (excluded.match(name) or excluded.match(rel_dir)):
+            return False
+        if rules and is_ignored(rules, rel_dir, is_dir):
+            return False
+        if is_dir and os.path.abspath(directory) in skip_dirs:
+            return False
+    return os.path.isfile(directory)
+
+
+def walk_py_files(root, excludes=DEFAULT_EXCLUDES, use_gitignore=True, max_depth=MAX_DEPTH, skip_dirs=(), dirs=None):
+    """
+    Iteratively walks the project with os.scandir.
+    Directories are told apart with DirEntry.is_dir() which needs no extra stat,
+    symlinked directories are not followed.
+    Excluded, git ignored and virtualenv directories (with a pyvenv.cfg) are never entered.
+    Entries are sorted so every run yields the files in the same order.
+
+    :param root: (str) the django project directory
+    :param excludes: (iterable[str]) glob patterns matched against names and project relative paths
+    :param use_gitignore: (bool) honour the .gitignore files of the project
+    :param max_depth: (int) directories nested deeper than this are not entered
+    :param skip_dirs: (iterable[str]) directories to leave out (chks_parent_dj_dir)
+    :param dirs: (list[str]) if passed every directory entered is appended to it (parse/watch.py)
+    :return: (generator[str]) paths of the py files
+    """
+    skip_dirs = set(os.path.abspath(skip_dir) for skip_dir in skip_dirs)
+    excluded = exclude_regex(excludes)
+    # (directory, path relative to root, depth, .gitignore rules that apply)
+    stack = [(root, '', 0, [])]
+    while stack:
+        directory, rel_dir, depth, rules = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError as error:
+            print('Could not read ' + directory + ': ' + str(error))
+            continue
+        if dirs is not None:
+            dirs.append(directory)
+        names = set(entry.name for entry in entries)
+        if depth > 0 and 'pyvenv.cfg' in names:
+            continue
+        if use_gitignore and '.gitignore' in names:
+            rules = rules + [IgnoreRules.read(rel_dir, os.path.join(directory, '.gitignore'))]
+        sub_dirs = []
+        for entry in entries:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if not is_dir and not entry.name.endswith('.py'):
+                continue
+            rel_path = rel_dir + '/' + entry.name if rel_dir else entry.name
+            if excluded is not None and (excluded.match(entry.name) or excluded.match(rel_path)):
+                continue
+            if rules and is_ignored(rules, rel_path, is_dir):
+                continue
+            if is_dir:
+                if depth + 1 > max_depth:
+                    print('Not entering ' + entry.path + ', it is nested deeper than ' + str(max_depth))
+                elif os.path.abspath(entry.path) not in skip_dirs:
+                    sub_dirs.append((entry.path, rel_path, depth + 1, rules))
+            elif entry.is_file():
+                yield entry.path
+        # reversed so the stack pops them in sorted order
+        stack.extend(reversed(sub_dirs))
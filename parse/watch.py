@@ -0,0 +1,262 @@
+"""
+A module for keeping the usage results of a project live while its files change
+"""
+
+import os
+import time
+from datetime import datetime
+
+# inotify_simple is optional, without it the project is polled
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+    flags = None
+
+
+def file_stat(f_name):
+    """
+    :param f_name: (str) filename
+    :return: (tuple[int, int]) (mtime_ns, size), None if the file is gone
+    """
+    try:
+        stat = os.stat(f_name)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class Watcher:
+    """
+    Keeps the imports of every project file and the reference counts of
+    CheckParentDjangoDirectory up to date as files are added, changed or deleted.
+    Only the files that changed are read again and
+    the reports are only written when their contents change.
+
+    Files are found by polling the mtimes of a walk of the project.
+    With inotify_simple installed on linux the watcher sleeps until a directory changes,
+    edits of known files then only stat the edited files.
+
+    Attributes
+    ----------
+    check : CheckParentDjangoDirectory
+        holds the reference counts and writes the reports
+    interval : float
+        seconds between polls, or the longest wait for an inotify event
+    imports : dict[str, dict[str, int]]
+        filename => package names it imports and their lines
+    stats : dict[str, tuple[int, int]]
+        filename => (mtime_ns, size) when it was last read
+    dirs : list[str]
+        the directories of the last walk
+    results : object
+        the report rows last written, to tell if they changed
+    writes : int
+        how many times the reports were written
+    use_inotify : bool
+        wait for inotify events instead of polling
+    inotify : INotify
+        the inotify instance, None while polling
+    watches : dict[int, str]
+        inotify watch descriptor => directory
+    """
+    def __init__(self, check, interval=1.0, use_inotify=True):
+        """
+        :param check: (CheckParentDjangoDirectory) a checker that has not been run
+        :param interval: (float) seconds between polls
+        :param use_inotify: (bool) use inotify_simple if it is installed
+        """
+        self.check = check
+        self.interval = interval
+        self.imports = {}
+        self.stats = {}
+        self.dirs = []
+        self.results = None
+        self.writes = 0
+        self.inotify = None
+        self.watches = {}
+        self.use_inotify = use_inotify and INotify is not None
+
+    def snapshot(self):
+        """
+        Walks the project and stats every py file
+
+        :return: (dict[str, tuple[int, int]]) filename => (mtime_ns, size)
+        """
+        dirs = []
+        stats = {}
+        for f_name in self.check.iter_files(dirs=dirs):
+            stat = file_stat(f_name)
+            if stat is not None:
+                stats[f_name] = stat
+        self.dirs = dirs
+        return stats
+
+    def update(self, stats):
+        """
+        Reads the files whose mtime or size changed and moves the reference counts
+
+        :param stats: (dict[str, tuple[int, int]]) filename => (mtime_ns, size) of the files that exist now
+        :return: (int) the number of files added, changed or deleted
+        """
+        removed = [f_name for f_name in self.stats if f_name not in stats]
+        changed = [f_name for f_name, stat in stats.items() if self.stats.get(f_name) != stat]
+        for f_name in removed:
+            self.forget(f_name)
+            del self.stats[f_name]
+        if changed:
+            try:
+                extracted = self.check.extract_imports(changed)
+            except OSError as error:
+                # deleted or replaced while it was read, the next round sees it again
+                print('Could not read a changed file: ' + str(error))
+                return len(removed)
+            for f_name, pkgs in zip(changed, extracted):
+                self.stats[f_name] = stats[f_name]
+                if self.imports.get(f_name) == pkgs:
+                    # touched or edited below the imports
+                    continue
+                self.forget(f_name)
+                self.imports[f_name] = pkgs
+                if pkgs:
+                    self.check.parse_project_file(pkgs, f_name)
+        return len(removed) + len(changed)
+
+    def forget(self, f_name):
+        """
+        :param f_name: (str) a file that changed or was deleted
+        """
+        pkgs = self.imports.pop(f_name, None)
+        if pkgs:
+            self.check.forget_project_file(pkgs, f_name)
+
+    def report_rows(self):
+        """
+        :return: (list) everything the reports hold except the timestamp
+        """
+        if self.check.stable_schema:
+            return [row[1:] for row in self.check.usage_rows()]
+        return [self.check.requirement_rows(), self.check.not_in_req_rows()]
+
+    def export(self):
+        """
+        Rewrites requirements-watch.csv and not_in_requirements-watch.csv (or usage-watch.csv)
+        if the results changed since the last ones, so a long watch leaves one set of reports
+
+        :return: (bool) True if the reports were written
+        """
+        results = self.report_rows()
+        if results == self.results:
+            return False
+        self.results = results
+        # the run column of the usage report, the file names stay the same
+        self.check.now = str(time.mktime(datetime.now().timetuple()))[:-2]
+        self.check.export(suffix='watch')
+        self.writes += 1
+        return True
+
+    def start(self):
+        """
+        The first full scan, it uses and refreshes the import cache like a run
+        """
+        print('watching ' + self.check.parent_dj_proj)
+        self.update(self.snapshot())
+        self.save_cache()
+        self.export()
+        if self.use_inotify:
+            self.add_watches()
+
+    def save_cache(self):
+        """
+        Drops the deleted files from the import cache and writes it
+        """
+        if self.check.cache is not None:
+            self.check.cache.prune(list(self.stats))
+            self.check.cache.save()
+
+    def add_watches(self):
+        """
+        Watches every directory of the last walk, replacing the old watches
+        """
+        if self.inotify is not None:
+            self.inotify.close()
+        self.inotify = INotify()
+        mask = (flags.CREATE | flags.MODIFY | flags.CLOSE_WRITE | flags.DELETE | flags.MOVED_FROM
+                | flags.MOVED_TO | flags.DELETE_SELF)
+        self.watches = {}
+        for directory in self.dirs:
+            try:
+                self.watches[self.inotify.add_watch(directory, mask)] = directory
+            except OSError:
+                # removed since the walk, the next rescan catches it
+                continue
+
+    def wait(self):
+        """
+        Sleeps until something may have changed
+
+        :return: (dict[str, tuple[int, int]]) the new stats of the project files
+        """
+        if self.inotify is None:
+            time.sleep(self.interval)
+            return self.snapshot()
+        events = self.inotify.read(timeout=int(self.interval * 1000))
+        if not events:
+            return self.stats
+        rescan = False
+        stats = dict(self.stats)
+        for event in events:
+            if event.mask & (flags.ISDIR | flags.DELETE_SELF | flags.Q_OVERFLOW) or event.name == '.gitignore':
+                rescan = True
+                break
+            if not event.name.endswith('.py'):
+                continue
+            f_name = os.path.join(self.watches.get(event.wd, ''), event.name)
+            if f_name not in stats:
+                # a new file, only a walk knows if it is excluded or ignored
+                rescan = True
+                break
+            stat = file_stat(f_name)
+            if stat is None:
+                del stats[f_name]
+            else:
+                stats[f_name] = stat
+        if rescan:
+            stats = self.snapshot()
+            self.add_watches()
+        return stats
+
+    def step(self):
+        """
+        One round, waits for changes, applies them and writes the reports if the results changed
+
+        :return: (bool) True if the reports were written
+        """
+        stats = self.wait()
+        start = time.perf_counter()
+        changed = self.update(stats)
+        if not changed:
+            return False
+        written = self.export()
+        print(str(changed) + ' files changed, ' + ('reports written' if written else 'results unchanged')
+              + ' in {:.1f}ms'.format((time.perf_counter() - start) * 1000))
+        return written
+
+    def run(self, rounds=None):
+        """
+        Watches until interrupted (Ctrl-C), the import cache is saved on the way out
+
+        :param rounds: (int) stop after this many rounds, None to watch forever
+        """
+        self.start()
+        try:
+            while rounds is None or rounds > 0:
+                self.step()
+                if rounds is not None:
+                    rounds -= 1
+        except KeyboardInterrupt:
+            print('stopped watching')
+        finally:
+            self.save_cache()
+            if self.inotify is not None:
+                self.inotify.close()